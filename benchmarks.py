@@ -0,0 +1,403 @@
+"""Performance benchmarks for the Chinese text analyzer and the vocabulary app.
+
+Usage:
+    python benchmarks.py lexicon [--source cedict_ts.u8] [--lookups 200000]
+    python benchmarks.py scheduler [--decks 1000 10000 100000] [--answers 20000]
+    python benchmarks.py analyzer [--latency 0.02] [--error-rate 0.0] [--save-baseline | --baseline]
+    python benchmarks.py app [--sizes 1000 10000 100000] [--save-baseline | --baseline]
+
+The analyzer and app suites report p50/p95 latency, throughput and peak
+traced memory per case. --save-baseline stores the results in
+benchmarks_baseline.json; --baseline compares against it and exits with
+status 1 when a case's p95 regressed by more than --tolerance (and by more
+than --min-delta-ms, so microsecond cases don't fail on timer noise).
+"""
+import argparse
+import gc
+import importlib.machinery
+import importlib.util
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYZER_SCRIPT = os.path.join(SCRIPT_DIR, "chinese words splitter")
+BASELINE_FILE = os.path.join(SCRIPT_DIR, "benchmarks_baseline.json")
+
+# Sentences the analyzer inputs are assembled from (short = 1, medium = 10, long = 100)
+SAMPLE_SENTENCES = [
+    "我們今天一起去圖書館學習漢語。",
+    "老師說這個字的發音很重要！",
+    "你明天有空嗎？我想請你吃飯。",
+    "北京大學的學生每天都很忙碌。",
+    "這家飯館的牛肉麵非常好吃。",
+    "週末我常常和朋友去公園散步。",
+    "他每天早上六點起床跑步。",
+    "學習一種新的語言需要很多時間。",
+    "天氣預報說下午可能會下雨。",
+    "我愛你，也愛我們的家。",
+]
+ANALYZER_INPUT_SENTENCES = {"short": 1, "medium": 10, "long": 100}
+
+
+def load_analyzer_module():
+    """Import the analyzer script (its file name is not a valid module name)"""
+    loader = importlib.machinery.SourceFileLoader("chinese_words_splitter", ANALYZER_SCRIPT)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[loader.name] = module
+    loader.exec_module(module)
+    return module
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage / (1024 * 1024) if sys.platform == "darwin" else usage / 1024
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_case(fn, repeat, items=1):
+    """Time repeat calls of fn (fn(i) for i in range(repeat)), then trace one more call for peak memory.
+
+    Returns p50/p95 latency in ms, throughput in items per second and the
+    peak Python heap allocated during a call in MB.
+    """
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    fn(repeat)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_ms": percentile(timings, 0.5) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "throughput": items * len(timings) / sum(timings),
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def report(suite, results, args):
+    """Print a results table, compare with and/or save the baseline; returns the exit status"""
+    baseline = {}
+    if os.path.exists(args.baseline_file):
+        with open(args.baseline_file, encoding="utf-8") as f:
+            baseline = json.load(f)
+    previous = baseline.get(suite, {}) if args.baseline else {}
+
+    regressions = []
+    print(f"{'case':<32}{'p50 (ms)':>10}{'p95 (ms)':>10}{'items/s':>11}{'peak (MB)':>11}{'p95 vs base':>13}")
+    for case, metrics in results.items():
+        change = ""
+        if case in previous:
+            ratio = metrics["p95_ms"] / max(previous[case]["p95_ms"], 1e-9) - 1
+            change = f"{ratio:+.0%}"
+            if ratio > args.tolerance and metrics["p95_ms"] - previous[case]["p95_ms"] > args.min_delta_ms:
+                regressions.append(case)
+                change += " !"
+        print(f"{case:<32}{metrics['p50_ms']:>10.2f}{metrics['p95_ms']:>10.2f}{metrics['throughput']:>11.1f}"
+              f"{metrics['peak_mb']:>11.2f}{change:>13}")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+
+    if args.save_baseline:
+        baseline[suite] = results
+        with open(args.baseline_file, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline_file}")
+    if args.baseline:
+        if not previous:
+            print(f"No {suite} baseline in {args.baseline_file}")
+        elif regressions:
+            print(f"p95 regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+        else:
+            print(f"No p95 regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+def write_synthetic_cedict(path, entries=120000, seed=0):
+    """Write a CC-CEDICT-format file roughly the size of the real dictionary"""
+    rng = random.Random(seed)
+    syllables = ["ma", "shi", "zhong", "guo", "xue", "ren", "da", "xiao", "hao", "lu:", "jian", "qing"]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(entries):
+            length = rng.choice((1, 2, 2, 2, 3, 4))
+            word = "".join(chr(0x4E00 + rng.randrange(0x5000)) for _ in range(length))
+            pinyin = " ".join(f"{rng.choice(syllables)}{rng.randint(1, 5)}" for _ in range(length))
+            f.write(f"{word} {word} [{pinyin}] /gloss {i}/second sense {i}/\n")
+
+
+def measure_load(factory):
+    """Time a loader and measure the Python heap it retains"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    lexicon = factory()
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return lexicon, elapsed, retained / (1024 * 1024)
+
+
+def measure_lookups(lexicon, keys):
+    start = time.perf_counter()
+    for key in keys:
+        lexicon.get_reading(key)
+    elapsed = time.perf_counter() - start
+    return elapsed / len(keys) * 1e6
+
+
+def bench_lexicon(args):
+    module = load_analyzer_module()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.source
+        if not source:
+            source = os.path.join(tmp, "synthetic_cedict.u8")
+            write_synthetic_cedict(source, entries=args.entries)
+        compiled = os.path.join(tmp, "bench.lex")
+
+        start = time.perf_counter()
+        count = module.build_lexicon(source, compiled)
+        build_time = time.perf_counter() - start
+        source_mb = os.path.getsize(source) / 1e6
+        compiled_mb = os.path.getsize(compiled) / 1e6
+
+        parsed, dict_load, dict_mb = measure_load(lambda: module.CedictDictionary(source))
+        mapped, mmap_load, mmap_mb = measure_load(lambda: module.MmapLexicon(compiled, decoded_cache_size=0))
+
+        rng = random.Random(1)
+        headwords = list(parsed.entries)
+        misses = ["".join(chr(0x9000 + rng.randrange(0xF00)) for _ in range(3)) for _ in range(1000)]
+        keys = [rng.choice(headwords) for _ in range(args.lookups)] + misses
+
+        dict_us = measure_lookups(parsed, keys)
+        mmap_us = measure_lookups(mapped, keys)
+        mapped.close()
+
+    print(f"Lexicon: {count} headwords from {source if args.source else 'synthetic CC-CEDICT'}")
+    print(f"Build step: {build_time:.2f}s ({source_mb:.1f} MB source -> {compiled_mb:.1f} MB lexicon)")
+    print(f"{'backend':<12}{'load (s)':>10}{'heap (MB)':>12}{'lookup (us)':>14}")
+    print(f"{'dict':<12}{dict_load:>10.3f}{dict_mb:>12.1f}{dict_us:>14.2f}")
+    print(f"{'mmap':<12}{mmap_load:>10.4f}{mmap_mb:>12.2f}{mmap_us:>14.2f}")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+
+
+def bench_scheduler(args):
+    """Simulate a learner answering quiz cards and time each next-card + answer step"""
+    from spaced_repetition import ReviewScheduler
+
+    print(f"{'deck':>8}{'build (s)':>11}{'mean (us)':>11}{'p95 (us)':>10}{'max heap':>10}{'store (KB)':>12}")
+    for deck in args.decks:
+        rng = random.Random(deck)
+        groups = [f"category {rng.randrange(args.categories)}" for _ in range(deck)]
+        start = time.perf_counter()
+        scheduler = ReviewScheduler(groups, seed=0)
+        build_time = time.perf_counter() - start
+
+        now = 0.0
+        timings = []
+        max_heap = 0
+        for _ in range(args.answers):
+            group = "All" if rng.random() < 0.5 else f"category {rng.randrange(args.categories)}"
+            correct = rng.random() < args.accuracy
+            tick = time.perf_counter_ns()
+            card = scheduler.next_card(group, now=now)
+            scheduler.answer(card, correct, now=now)
+            timings.append(time.perf_counter_ns() - tick)
+            max_heap = max(max_heap, len(scheduler._due["All"]))
+            now += args.seconds_per_answer
+
+        timings.sort()
+        mean_us = sum(timings) / len(timings) / 1000
+        p95_us = timings[int(len(timings) * 0.95)] / 1000
+        store = scheduler.store
+        store_kb = sum(array.nbytes for array in (store.ease, store.interval, store.repetitions,
+                                                  store.lapses, store.reviews, store.due)) / 1024
+        print(f"{deck:>8}{build_time:>11.3f}{mean_us:>11.2f}{p95_us:>10.2f}{max_heap:>10}{store_kb:>12.1f}")
+    print(f"{args.answers} answers per deck, {args.accuracy:.0%} correct, {args.seconds_per_answer:g}s between answers")
+    print(f"Peak RSS: {peak_rss_mb():.1f} MB")
+
+
+def analyzer_inputs(seed=0):
+    rng = random.Random(seed)
+    return {size: "".join(rng.choice(SAMPLE_SENTENCES) for _ in range(count))
+            for size, count in ANALYZER_INPUT_SENTENCES.items()}
+
+
+def bench_analyzer(args):
+    """Segmentation, online lookups against the local stub, and analyze_text end to end"""
+    from translation_stub import TranslationStub, point_analyzer_at
+
+    module = load_analyzer_module()
+    stub = TranslationStub(seed=args.seed).start()
+    for endpoint in ("google", "mymemory"):
+        stub.configure(endpoint, latency=args.latency, error_rate=args.error_rate)
+    point_analyzer_at(module, stub, timeout=args.timeout)
+    module.configure_outbound_limiter(rate=args.rate)
+    inputs = analyzer_inputs(args.seed)
+    module.warm_segmenter()
+
+    def fresh_analyzer():
+        # Cold caches and no persistent store, so every run does the same lookups
+        analyzer = module.EnhancedChineseAnalyzer(pinyin_cache=module.LookupCache(),
+                                                  translation_cache=module.LookupCache())
+        if not args.with_dictionary:
+            analyzer.pinyin_converter.cedict = None
+        return analyzer
+
+    results = {}
+    try:
+        for size, text in inputs.items():
+            results[f"jieba.cut/{size}"] = run_case(lambda i: list(module.jieba.cut(text)), args.repeat * 10, len(text))
+
+        converter = fresh_analyzer().pinyin_converter
+        words = module.segment_chinese_words(inputs["long"])
+        results["get_comprehensive_pinyin"] = run_case(
+            lambda i: converter.get_comprehensive_pinyin(f"{words[i % len(words)]}{i}"), args.repeat * 5)
+        results["translate_text"] = run_case(
+            lambda i: converter.translate_text(f"{words[i % len(words)]}{i}"), args.repeat * 5)
+
+        for size, text in inputs.items():
+            repeat = max(3, int(args.repeat / ANALYZER_INPUT_SENTENCES[size] ** 0.5))
+            results[f"analyze_text/{size}"] = run_case(lambda i: fresh_analyzer().analyze_text(text), repeat, len(text))
+    finally:
+        stub.stop()
+
+    print(f"Stub latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.0%}, "
+          f"offline dictionary {'on' if args.with_dictionary else 'off'}, "
+          f"inputs {', '.join(f'{size} {len(text)} chars' for size, text in inputs.items())}; "
+          f"stub served {stub.request_counts}")
+    return report("analyzer", results, args)
+
+
+def synthetic_vocabulary(size, categories=20, seed=0):
+    """Vocabulary frame with the app's columns, random words and a few speech sentences"""
+    import pandas as pd
+    from vocabulary import prepare_vocabulary
+
+    rng = random.Random(seed)
+    syllables = ["mā", "shì", "zhōng", "guó", "xué", "rén", "dà", "xiǎo", "hǎo", "lǜ", "jiàn", "qíng", "nǐ", "wǒ"]
+    rows = []
+    for i in range(size):
+        length = rng.choice((1, 2, 2, 2, 3, 4))
+        category = "Speech" if i % 100 == 99 else f"Category {rng.randrange(categories)}"
+        rows.append((
+            f"{rng.choice(('water', 'tea', 'book', 'friend', 'school', 'red', 'run'))} {i}",
+            "".join(chr(0x4E00 + rng.randrange(0x5000)) for _ in range(length)),
+            " ".join(rng.choice(syllables) for _ in range(length)),
+            category,
+        ))
+    return prepare_vocabulary(pd.DataFrame(rows, columns=["English Word", "Traditional Chinese Word", "Pinyin", "Category"]))
+
+
+def bench_app(args):
+    """Vocabulary load, Learning Mode filtering and quiz question generation as the vocabulary grows"""
+    import numpy as np
+    from spaced_repetition import ReviewScheduler
+    from vocabulary import QuizPools, VocabularySearchIndex, filter_vocabulary, load_vocabulary_file, snapshot_path
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            frame = synthetic_vocabulary(size, seed=args.seed)
+            path = os.path.join(tmp, f"vocabulary_{size}.xlsx")
+            frame.to_excel(path, index=False)
+
+            def cold_load(i):
+                # Without a snapshot the load parses the xlsx (and writes the snapshot)
+                if os.path.exists(snapshot_path(path)):
+                    os.remove(snapshot_path(path))
+                load_vocabulary_file(path)
+
+            results[f"load xlsx/{size}"] = run_case(cold_load, 1, size)
+            results[f"load snapshot/{size}"] = run_case(lambda i: load_vocabulary_file(path), args.repeat, size)
+
+            results[f"search index/{size}"] = run_case(lambda i: VocabularySearchIndex(frame), max(1, args.repeat // 10), size)
+            index = VocabularySearchIndex(frame)
+            categories = frame["Category"].cat.categories.tolist()
+            rng = random.Random(args.seed)
+            queries = [(rng.choice(["All"] + categories), rng.choice(["", "wat", "book 1", "你", "xue", "hao"]))
+                       for _ in range(args.repeat * 10 + 1)]
+            results[f"filter/{size}"] = run_case(lambda i: filter_vocabulary(frame, index, *queries[i]), args.repeat * 10)
+
+            pools = QuizPools(frame)
+            scheduler = ReviewScheduler(pools.schedule_groups(), seed=args.seed)
+            quiz_rng = np.random.default_rng(args.seed)
+            quiz_categories = [rng.choice(["All"] + [c for c in categories if c != "Speech"]) for _ in range(args.repeat * 10 + 1)]
+
+            def quiz_step(i):
+                # generate_quiz_question plus answering it, as one click of the quiz does
+                category = quiz_categories[i]
+                row = scheduler.next_card(category, now=i * 20.0)
+                pools.question(row, category, "Hard", quiz_rng)
+                scheduler.answer(row, i % 5 != 0, now=i * 20.0)
+
+            results[f"quiz question/{size}"] = run_case(quiz_step, args.repeat * 10)
+            results[f"quiz pools/{size}"] = run_case(lambda i: QuizPools(frame), max(1, args.repeat // 10), size)
+
+    return report("app", results, args)
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per case (scaled down for slow cases)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", action="store_true", help="Compare with the saved baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Save these results as the baseline")
+    parser.add_argument("--baseline-file", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 slowdown before a case counts as regressed")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="Ignore p95 slowdowns smaller than this (timer noise)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chinese text analyzer benchmarks")
+    subparsers = parser.add_subparsers(dest="suite", required=True)
+
+    lexicon = subparsers.add_parser("lexicon", help="Compare dict-based and memory-mapped dictionary loading")
+    lexicon.add_argument("--source", help="CC-CEDICT file (default: synthetic file)")
+    lexicon.add_argument("--entries", type=int, default=120000, help="Synthetic dictionary size")
+    lexicon.add_argument("--lookups", type=int, default=200000, help="Number of random lookups")
+    lexicon.set_defaults(func=bench_lexicon)
+
+    scheduler = subparsers.add_parser("scheduler", help="Per-answer cost of the spaced-repetition scheduler as the deck grows")
+    scheduler.add_argument("--decks", type=int, nargs="+", default=[1000, 10000, 100000], help="Deck sizes to simulate")
+    scheduler.add_argument("--answers", type=int, default=20000, help="Answers simulated per deck")
+    scheduler.add_argument("--categories", type=int, default=20, help="Number of quiz categories")
+    scheduler.add_argument("--accuracy", type=float, default=0.85, help="Probability of a correct answer")
+    scheduler.add_argument("--seconds-per-answer", type=float, default=20.0, help="Simulated time between answers")
+    scheduler.set_defaults(func=bench_scheduler)
+
+    analyzer = subparsers.add_parser("analyzer", help="Segmentation, stubbed online lookups and analyze_text end to end")
+    analyzer.add_argument("--latency", type=float, default=0.02, help="Stub response time in seconds")
+    analyzer.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub requests answered with 503")
+    analyzer.add_argument("--timeout", type=float, default=0.5, help="Request timeout against the stub")
+    analyzer.add_argument("--rate", type=float, default=0.0, help="Outbound requests per second (0: no limit)")
+    analyzer.add_argument("--with-dictionary", action="store_true", help="Keep the offline dictionary (fewer online lookups)")
+    add_baseline_arguments(analyzer)
+    analyzer.set_defaults(func=bench_analyzer)
+
+    app = subparsers.add_parser("app", help="Vocabulary load, filtering and quiz generation at several vocabulary sizes")
+    app.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Synthetic vocabulary sizes")
+    add_baseline_arguments(app)
+    app.set_defaults(func=bench_app)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""Durable per-learner quiz progress in SQLite.
+
+Every answer is appended to review_events. The same transaction upserts the
+card's latest spaced-repetition state (card_state) and bumps the learner's
+running totals (learner_stats), so stats are read from one indexed row and
+never recomputed from the event log. Writes are queued and flushed in batches
+by a background thread (write_behind.WriteBehindQueue), so answer clicks never
+wait on disk.
+"""
+import os
+import threading
+
+from write_behind import WriteBehindQueue, connect
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROGRESS_DB_FILE = os.environ.get("PROGRESS_DB_FILE", os.path.join(SCRIPT_DIR, "progress.sqlite3"))
+PROGRESS_FLUSH_INTERVAL = 1.0
+PROGRESS_BATCH_SIZE = 500
+
+CARD_STATE_FIELDS = ("ease", "interval", "repetitions", "lapses", "reviews", "due")
+
+
+class ProgressStore:
+    """Append-only review log plus incrementally maintained aggregates, written behind the UI"""
+
+    def __init__(self, path=PROGRESS_DB_FILE):
+        self.path = path
+        self._read_lock = threading.Lock()
+        self._reader = connect(path)
+        self._reader.executescript("""
+            CREATE TABLE IF NOT EXISTS review_events (
+                id INTEGER PRIMARY KEY,
+                learner TEXT NOT NULL,
+                word TEXT NOT NULL,
+                english TEXT NOT NULL,
+                category TEXT NOT NULL,
+                correct INTEGER NOT NULL,
+                answered_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS review_events_learner ON review_events (learner, answered_at);
+            CREATE INDEX IF NOT EXISTS review_events_category ON review_events (learner, category);
+
+            CREATE TABLE IF NOT EXISTS card_state (
+                learner TEXT NOT NULL,
+                word TEXT NOT NULL,
+                english TEXT NOT NULL,
+                ease REAL NOT NULL,
+                interval REAL NOT NULL,
+                repetitions INTEGER NOT NULL,
+                lapses INTEGER NOT NULL,
+                reviews INTEGER NOT NULL,
+                due REAL NOT NULL,
+                PRIMARY KEY (learner, word, english)
+            );
+
+            CREATE TABLE IF NOT EXISTS learner_stats (
+                learner TEXT PRIMARY KEY,
+                answered INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0,
+                last_answered_at REAL
+            );
+        """)
+        self._writes = WriteBehindQueue(path, self._apply, "progress-store",
+                                        flush_interval=PROGRESS_FLUSH_INTERVAL, batch_size=PROGRESS_BATCH_SIZE)
+
+    @property
+    def writes(self):
+        return self._writes.written
+
+    def record_answer(self, learner, word, english, category, correct, answered_at, state):
+        """Queue one answer; state maps CARD_STATE_FIELDS to the card's new scheduler values"""
+        self._writes.put(("answer", (learner, word, english, category, int(correct), answered_at,
+                                    tuple(state[field] for field in CARD_STATE_FIELDS))))
+
+    def reset(self, learner):
+        """Queue deletion of a learner's history (applied in order with pending answers)"""
+        self._writes.put(("reset", learner))
+
+    def totals(self, learner):
+        """(answered, correct) for a learner, from the aggregate row"""
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT answered, correct FROM learner_stats WHERE learner = ?", (learner,)
+            ).fetchone()
+        return row if row is not None else (0, 0)
+
+    def card_states(self, learner):
+        """Latest scheduler state per (word, english) the learner has answered"""
+        with self._read_lock:
+            return self._reader.execute(
+                f"SELECT word, english, {', '.join(CARD_STATE_FIELDS)} FROM card_state WHERE learner = ?", (learner,)
+            ).fetchall()
+
+    def category_accuracy(self, learner):
+        """(category, answered, correct) rows for a learner"""
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT category, COUNT(*), SUM(correct) FROM review_events WHERE learner = ? "
+                "GROUP BY category ORDER BY COUNT(*) DESC", (learner,)
+            ).fetchall()
+
+    def pending(self):
+        return self._writes.pending()
+
+    def _apply(self, writer, batch):
+        for kind, payload in batch:
+            if kind == "reset":
+                for table in ("review_events", "card_state", "learner_stats"):
+                    writer.execute(f"DELETE FROM {table} WHERE learner = ?", (payload,))
+                continue
+            learner, word, english, category, correct, answered_at, state = payload
+            writer.execute(
+                "INSERT INTO review_events (learner, word, english, category, correct, answered_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (learner, word, english, category, correct, answered_at)
+            )
+            writer.execute(
+                f"INSERT OR REPLACE INTO card_state (learner, word, english, {', '.join(CARD_STATE_FIELDS)}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (learner, word, english) + state
+            )
+            writer.execute(
+                "INSERT INTO learner_stats (learner, answered, correct, last_answered_at) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT (learner) DO UPDATE SET answered = answered + 1, correct = correct + excluded.correct, "
+                "last_answered_at = excluded.last_answered_at",
+                (learner, correct, answered_at)
+            )
+
+    def close(self):
+        """Flush queued writes and stop the writer thread"""
+        self._writes.close()
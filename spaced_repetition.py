@@ -0,0 +1,190 @@
+"""SM-2 spaced-repetition scheduling for the vocabulary quiz.
+
+Review state lives in parallel NumPy arrays indexed by card (a vocabulary
+row), and reviewed cards sit in binary heaps ordered by due time, so picking
+the next card and recording an answer cost O(log n) however large the deck is.
+"""
+import heapq
+from collections import deque
+
+import numpy as np
+
+ALL_GROUPS = "All"
+DAY = 86400.0
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+RELEARN_DELAY = 600.0  # seconds before a missed card is asked again
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 1
+
+
+def sm2(ease, interval, repetitions, quality):
+    """One SM-2 step: returns the new (ease, interval in days, repetitions)"""
+    if quality >= 3:
+        if repetitions == 0:
+            interval = 1.0
+        elif repetitions == 1:
+            interval = 6.0
+        else:
+            interval = round(interval * ease)
+        repetitions += 1
+    else:
+        repetitions = 0
+        interval = 1.0
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval, repetitions
+
+
+class CardStore:
+    """Review state for every card, one NumPy array per field"""
+
+    def __init__(self, size):
+        self.ease = np.full(size, INITIAL_EASE, dtype=np.float32)
+        self.interval = np.zeros(size, dtype=np.float32)
+        self.repetitions = np.zeros(size, dtype=np.int32)
+        self.lapses = np.zeros(size, dtype=np.int32)
+        self.reviews = np.zeros(size, dtype=np.int32)
+        self.due = np.full(size, np.inf)  # unseen cards are never due
+
+    def __len__(self):
+        return len(self.due)
+
+
+class ReviewScheduler:
+    """Chooses the next card per group (quiz category) and applies SM-2 to answers.
+
+    Every group, plus ALL_GROUPS, has a heap of (due, card) entries for cards
+    already reviewed and a queue of unseen cards in random order. Answering a
+    card pushes a fresh heap entry; the old one goes stale and is skipped (and
+    eventually compacted away) instead of being searched for and removed.
+    """
+
+    def __init__(self, groups, seed=None, store=None):
+        self.groups = list(groups)
+        self.store = store if store is not None else CardStore(len(self.groups))
+        self._rng = np.random.default_rng(seed)
+        self._due = {}
+        self._new = {}
+        self._seen = {}
+        self.size = 0
+
+        members = {}
+        for card, group in enumerate(self.groups):
+            if group is None:
+                continue  # not schedulable (e.g. speech sentences)
+            self.size += 1
+            members.setdefault(ALL_GROUPS, []).append(card)
+            members.setdefault(group, []).append(card)
+        for group, cards in members.items():
+            cards = np.asarray(cards)
+            seen = self.store.reviews[cards] > 0
+            unseen = cards[~seen]
+            self._new[group] = deque(unseen[self._rng.permutation(len(unseen))].tolist())
+            self._due[group] = [(float(self.store.due[card]), int(card)) for card in cards[seen]]
+            heapq.heapify(self._due[group])
+            self._seen[group] = int(seen.sum())
+
+    def __len__(self):
+        return self.size
+
+    def _valid(self, entry):
+        due, card = entry
+        return due == self.store.due[card]
+
+    def _top(self, group):
+        heap = self._due[group]
+        while heap and not self._valid(heap[0]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _next_new(self, group):
+        queue = self._new[group]
+        while queue and self.store.reviews[queue[0]] > 0:
+            queue.popleft()  # introduced through another group
+        return queue[0] if queue else None
+
+    def next_card(self, group=ALL_GROUPS, now=0.0):
+        """Card to ask next: the most overdue review, else a new card, else the earliest upcoming review"""
+        if group not in self._due:
+            return None
+        top = self._top(group)
+        if top is not None and top[0] <= now:
+            return top[1]
+        new_card = self._next_new(group)
+        if new_card is not None:
+            return new_card
+        return top[1] if top is not None else None
+
+    def next_cards(self, group=ALL_GROUPS, now=0.0, count=1):
+        """Up to `count` distinct cards in next_card's order: due reviews, new cards, then upcoming reviews.
+
+        Costs O(count log n): the earliest reviews are popped off the heap and pushed back.
+        """
+        if group not in self._due:
+            return []
+        heap = self._due[group]
+        reviews = []
+        while heap and len(reviews) < count:
+            entry = heapq.heappop(heap)
+            if self._valid(entry):
+                reviews.append(entry)
+        for entry in reviews:
+            heapq.heappush(heap, entry)
+
+        due = [card for card_due, card in reviews if card_due <= now]
+        new = []
+        for card in self._new[group]:
+            if len(due) + len(new) >= count:
+                break
+            if self.store.reviews[card] == 0:
+                new.append(card)
+        upcoming = [card for card_due, card in reviews if card_due > now]
+        return list(dict.fromkeys(due + new + upcoming))[:count]
+
+    def answer(self, card, correct, now=0.0):
+        """Record an answer and reschedule the card; returns its next due time.
+
+        A correct answer before the card is due (practicing ahead) keeps the
+        current schedule, so extra practice cannot inflate the interval.
+        """
+        store = self.store
+        if correct and store.reviews[card] > 0 and now < store.due[card]:
+            store.reviews[card] += 1
+            return float(store.due[card])
+        quality = CORRECT_QUALITY if correct else INCORRECT_QUALITY
+        ease, interval, repetitions = sm2(float(store.ease[card]), float(store.interval[card]),
+                                          int(store.repetitions[card]), quality)
+        store.ease[card] = ease
+        store.interval[card] = interval
+        store.repetitions[card] = repetitions
+        if not correct:
+            store.lapses[card] += 1
+        due = now + (interval * DAY if correct else RELEARN_DELAY)
+        store.due[card] = due
+
+        first_review = store.reviews[card] == 0
+        store.reviews[card] += 1
+        for group in (ALL_GROUPS, self.groups[card]):
+            if first_review:
+                self._seen[group] += 1
+            heap = self._due[group]
+            heapq.heappush(heap, (due, card))
+            if len(heap) > 2 * self._seen[group] + 64:
+                self._compact(group)
+        return due
+
+    def _compact(self, group):
+        self._due[group] = [entry for entry in self._due[group] if self._valid(entry)]
+        heapq.heapify(self._due[group])
+
+    def due_count(self, now):
+        return int(np.count_nonzero(self.store.due <= now))
+
+    def stats(self, now):
+        store = self.store
+        return {
+            "cards": len(self),
+            "seen": self._seen.get(ALL_GROUPS, 0),
+            "due": self.due_count(now),
+            "lapses": int(store.lapses.sum()),
+        }
@@ -1,10 +1,22 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import base64
 from io import BytesIO
 import random
 import time
 import os
+import hashlib
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+
+from progress_store import CARD_STATE_FIELDS, ProgressStore
+from spaced_repetition import CardStore, ReviewScheduler
+from vocabulary import (PARQUET_AVAILABLE, REQUIRED_COLUMNS, SNAPSHOT_FORMAT, QuizPools, VocabularySearchIndex, filter_vocabulary,
+                        load_vocabulary_file, match_rows, parse_vocabulary_file, prepare_vocabulary, read_snapshot,
+                        write_snapshot)
 
 # Try to import gTTS, with fallback if not available
 try:
@@ -14,31 +26,253 @@ except ImportError:
     TTS_AVAILABLE = False
     st.warning("⚠️ Text-to-speech functionality is not available. Audio features will be disabled.")
 
-# Check if Excel file exists
+# Rerun instrumentation: ?timing=1 (or RERUN_TIMING=1) shows how long each script section took
+RERUN_TIMING = os.environ.get("RERUN_TIMING") == "1"
+RERUN_TIMING_HISTORY = 20  # reruns averaged in the overlay
+logger = logging.getLogger(__name__)
+
+class RerunTimer:
+    """Wall time per script section of one rerun, marked at section boundaries"""
+
+    def __init__(self):
+        self.sections = []
+        self._name = None
+        self._start = time.perf_counter()
+
+    def mark(self, name):
+        """Close the running section and start timing the next one (None just closes)"""
+        now = time.perf_counter()
+        if self._name is not None:
+            self.sections.append((self._name, (now - self._start) * 1000))
+        self._name, self._start = name, now
+
+    def render(self, history):
+        """Fixed overlay with this rerun's section times and their average over recent reruns"""
+        self.mark(None)
+        history.append(dict(self.sections))
+        del history[:-RERUN_TIMING_HISTORY]
+        total = sum(ms for _, ms in self.sections)
+        logger.info("rerun %.1f ms: %s", total, ", ".join(f"{name} {ms:.1f}" for name, ms in self.sections))
+        
+        rows = "".join(
+            f"<tr><td>{name}</td><td style='text-align: right;'>{ms:.1f}</td>"
+            f"<td style='text-align: right;'>{sum(run.get(name, 0) for run in history) / len(history):.1f}</td></tr>"
+            for name, ms in self.sections
+        )
+        st.markdown(f"""
+            <div style="position: fixed; bottom: 1rem; right: 1rem; z-index: 1000; background: rgba(0,0,0,0.75); color: white; border-radius: 10px; padding: 0.75rem 1rem; font-family: monospace; font-size: 0.8rem;">
+                <table><tr><th>⏱️ section</th><th>ms</th><th>avg {len(history)}</th></tr>{rows}
+                <tr><td><b>total</b></td><td style='text-align: right;'><b>{total:.1f}</b></td><td></td></tr></table>
+            </div>
+        """, unsafe_allow_html=True)
+
+rerun_timer = RerunTimer()
+rerun_timer.mark("Vocabulary")
+
+# Vocabulary file settings
 EXCEL_FILE = "china.xlsx"
-if os.path.exists(EXCEL_FILE):
+@st.cache_resource(max_entries=4, show_spinner="📚 Loading vocabulary...")
+def load_vocabulary(path, mtime_ns, size):
+    """Vocabulary frame for one version of the file (mtime_ns and size key the cache).
+    
+    Shared by every session, so callers must not modify it in place.
+    """
+    return load_vocabulary_file(path)
+
+# Uploaded vocabularies are stored once per distinct file content
+UPLOAD_DIR = os.environ.get("VOCABULARY_UPLOAD_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads"))
+UPLOAD_TYPES = ['xlsx', 'csv'] + (['parquet'] if PARQUET_AVAILABLE else [])
+UPLOAD_TYPE_NAMES = "Excel (.xlsx), CSV or Parquet" if PARQUET_AVAILABLE else "Excel (.xlsx) or CSV"
+
+def upload_path(upload_id):
+    return os.path.join(UPLOAD_DIR, f"{upload_id}.{SNAPSHOT_FORMAT}")
+
+def ingest_upload(name, data):
+    """Store an uploaded vocabulary under its content hash (parsing each distinct file only once); returns its id"""
+    upload_id = hashlib.sha256(data).hexdigest()[:16]
+    path = upload_path(upload_id)
+    if not os.path.exists(path):
+        frame = parse_vocabulary_file(name, data)
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        write_snapshot(frame, path, upload_id)
+        if not os.path.exists(path):
+            raise OSError(f"Could not store the upload in {UPLOAD_DIR}")
+    return upload_id
+
+@st.cache_resource(max_entries=4, show_spinner="📚 Loading vocabulary...")
+def load_uploaded_vocabulary(upload_id):
+    """Vocabulary frame for a stored upload (shared by every session, must not be modified in place)"""
+    frame = read_snapshot(upload_path(upload_id), upload_id)
+    if frame is None:
+        raise FileNotFoundError(f"Uploaded vocabulary {upload_id} is missing")
+    frame.attrs.clear()
+    return frame
+
+# Load the vocabulary: an upload selected through ?vocabulary=<id>, else china.xlsx
+upload_id = st.query_params.get("vocabulary")
+if upload_id and os.path.exists(upload_path(upload_id)):
+    df = load_uploaded_vocabulary(upload_id)
+    vocabulary_version = f"upload:{upload_id}"
+elif os.path.exists(EXCEL_FILE):
     try:
-        df = pd.read_excel(EXCEL_FILE)
+        excel_stat = os.stat(EXCEL_FILE)
+        df = load_vocabulary(EXCEL_FILE, excel_stat.st_mtime_ns, excel_stat.st_size)
+        vocabulary_version = f"{EXCEL_FILE}:{excel_stat.st_mtime_ns}:{excel_stat.st_size}"
     except Exception as e:
         st.error(f"Error reading Excel file: {e}")
         # Create sample data if file can't be read
-        df = pd.DataFrame({
+        df = prepare_vocabulary(pd.DataFrame({
             'English Word': ['Hello', 'Thank you', 'Goodbye', 'Water', 'Food'],
             'Traditional Chinese Word': ['你好', '謝謝', '再見', '水', '食物'],
             'Pinyin': ['nǐ hǎo', 'xiè xiè', 'zài jiàn', 'shuǐ', 'shí wù'],
             'Category': ['Greetings', 'Greetings', 'Greetings', 'Basic', 'Food']
-        })
+        }))
+        vocabulary_version = "sample:errored"
 else:
     st.error("❌ Excel file 'china.xlsx' not found. Please upload your Chinese vocabulary file.")
     # Create sample data for demonstration
-    df = pd.DataFrame({
+    df = prepare_vocabulary(pd.DataFrame({
         'English Word': ['Hello', 'Thank you', 'Goodbye', 'Water', 'Food', 'Mother', 'Father', 'Red', 'Blue', 'One'],
         'Traditional Chinese Word': ['你好', '謝謝', '再見', '水', '食物', '媽媽', '爸爸', '紅色', '藍色', '一'],
         'Pinyin': ['nǐ hǎo', 'xiè xiè', 'zài jiàn', 'shuǐ', 'shí wù', 'mā ma', 'bà ba', 'hóng sè', 'lán sè', 'yī'],
         'Category': ['Greetings', 'Greetings', 'Greetings', 'Basic', 'Food', 'Family', 'Family', 'Colors', 'Colors', 'Numbers']
-    })
+    }))
+    vocabulary_version = "sample:missing"
     st.info("📝 Using sample data for demonstration. Upload your own 'china.xlsx' file to use your vocabulary.")
 
+rerun_timer.mark("Indexes")
+
+@st.cache_resource(max_entries=4, show_spinner="🔎 Indexing vocabulary...")
+def get_search_index(version, _frame, _previous=None, _remap=None):
+    """Search index built once per vocabulary version (incrementally when the previous index is given)"""
+    return VocabularySearchIndex(_frame, _previous, _remap)
+
+search_index = get_search_index(vocabulary_version, df)
+
+@st.cache_resource(max_entries=4)
+def get_quiz_pools(version, _frame):
+    """Quiz pools built once per vocabulary version"""
+    return QuizPools(_frame)
+
+quiz_pools = get_quiz_pools(vocabulary_version, df)
+
+# Speech practice settings
+SPEECH_SPEEDS = {"normal": False, "slow": True}  # speed -> gTTS slow flag
+MAX_SPEECH_SENTENCES = 20
+
+@st.cache_resource(max_entries=4)
+def get_speech_index(version, _frame):
+    """Row positions of the speech sentences, found once per vocabulary version"""
+    return np.flatnonzero(_frame["Category"].astype(str).str.contains("speech", case=False, na=False).to_numpy())
+
+speech_rows = get_speech_index(vocabulary_version, df)
+
+@st.cache_resource(max_entries=4)
+def get_vocabulary_stats(version, _frame):
+    """Header counts, computed once per vocabulary version"""
+    categories = _frame["Category"].astype(str)
+    return {
+        "total_words": len(_frame),
+        "categories": categories.nunique(),
+        "speech_sentences": int(categories.str.contains("speech", case=False, na=False).sum()),
+    }
+
+vocabulary_stats = get_vocabulary_stats(vocabulary_version, df)
+
+@st.cache_resource
+def get_progress_store():
+    """Process-wide progress database shared by every session"""
+    return ProgressStore()
+
+progress_store = get_progress_store()
+
+# Learner identity lives in the URL (?learner=...), so a bookmarked link keeps its progress
+if "learner" not in st.query_params:
+    st.query_params["learner"] = uuid.uuid4().hex[:12]
+learner_id = st.query_params["learner"]
+
+def load_card_store(learner):
+    """Scheduler state for every vocabulary row, restored from the learner's saved card states"""
+    card_store = CardStore(len(df))
+    rows_by_word = {}
+    for row, key in enumerate(zip(quiz_pools.columns["Traditional Chinese Word"], quiz_pools.columns["English Word"])):
+        rows_by_word.setdefault(key, []).append(row)
+    for word, english, *state in progress_store.card_states(learner):
+        for row in rows_by_word.get((word, english), ()):
+            for field, value in zip(CARD_STATE_FIELDS, state):
+                getattr(card_store, field)[row] = value
+    return card_store
+
+def record_quiz_answer(question, correct):
+    """Update the scheduler and queue the answer for the progress database"""
+    now = time.time()
+    row = question["row"]
+    scheduler = st.session_state.review_scheduler
+    scheduler.answer(row, correct, now=now)
+    state = {field: getattr(scheduler.store, field)[row].item() for field in CARD_STATE_FIELDS}
+    progress_store.record_answer(learner_id, question["Traditional Chinese Word"], question["English Word"],
+                                 question["Category"], correct, now, state)
+
+def clear_quiz_question():
+    """Drop the question on screen and the pre-drawn ones; their rows belong to the scheduler (and vocabulary) they came from"""
+    st.session_state.current_question = None
+    st.session_state.quiz_queue = []
+    st.session_state.quiz_options = []
+    st.session_state.correct_answer = ""
+    st.session_state.quiz_answered = False
+
+def on_vocabulary_change():
+    """Forget session state that points into the previous vocabulary (rows, drawn sentences, pages)"""
+    clear_quiz_question()
+    st.session_state.current_speech = []
+    st.session_state.pop('learn_filter', None)  # the Learning Mode pager starts over at page 1
+
+# Quiz settings
+QUIZ_QUEUE_SIZE = 5  # questions drawn ahead so "New Question" is served from session state
+QUIZ_QUEUE_MAX_AGE = 60.0  # seconds before the queue is redrawn, so newly due reviews are not held back
+
+# Learning Mode settings
+CARD_PAGE_SIZES = [12, 24, 48, 96]
+DEFAULT_CARD_PAGE_SIZE = 24
+
+# Color schemes for categories
+CATEGORY_COLORS = {
+    "Greetings": ["#ff6b6b", "#ffa726"],
+    "Family": ["#4ecdc4", "#45b7d1"],
+    "Food": ["#f093fb", "#f5576c"],
+    "Numbers": ["#a8e6cf", "#56ab91"],
+    "Colors": ["#ff8a80", "#ffab91"],
+    "Animals": ["#ce93d8", "#ba68c8"],
+    "Time": ["#90caf9", "#42a5f5"],
+    "Weather": ["#fff176", "#ffcc02"]
+}
+DEFAULT_CATEGORY_COLORS = ["#667eea", "#764ba2"]
+
+def escape_html(values):
+    return (values.astype(str).str.replace("&", "&amp;", regex=False)
+            .str.replace("<", "&lt;", regex=False).str.replace(">", "&gt;", regex=False))
+
+def build_word_cards_html(page_df):
+    """HTML for a page of word cards, built column-wise rather than row by row"""
+    categories = page_df["Category"].astype(str)
+    start_color = categories.map(lambda name: CATEGORY_COLORS.get(name, DEFAULT_CATEGORY_COLORS)[0])
+    end_color = categories.map(lambda name: CATEGORY_COLORS.get(name, DEFAULT_CATEGORY_COLORS)[1])
+    cards = (
+        '<div class="word-card" style="border-left: 5px solid ' + start_color + ';">'
+        + '<div class="english-word">' + escape_html(page_df["English Word"]) + '</div>'
+        + '<div class="chinese-word">' + escape_html(page_df["Traditional Chinese Word"]) + '</div>'
+        + '<div class="pinyin-word">' + escape_html(page_df["Pinyin"]) + '</div>'
+        + '<div style="margin-top: 1rem;"><span class="category-tag" style="background: linear-gradient(45deg, '
+        + start_color + ', ' + end_color + ');">' + escape_html(categories) + '</span></div>'
+        + '</div>'
+    )
+    return "".join(cards.tolist())
+
+def change_learn_page(step, page_count):
+    st.session_state.learn_page = min(max(st.session_state.learn_page + step, 1), page_count)
+
+rerun_timer.mark("Session state")
+
 # Initialize session state for quiz
 if 'quiz_active' not in st.session_state:
     st.session_state.quiz_active = False
@@ -60,30 +294,214 @@ if 'quiz_category' not in st.session_state:
     st.session_state.quiz_category = "All"
 if 'quiz_difficulty' not in st.session_state:
     st.session_state.quiz_difficulty = "Easy"
+if 'quiz_rng' not in st.session_state:
+    st.session_state.quiz_rng = np.random.default_rng()
+if 'quiz_queue' not in st.session_state:
+    st.session_state.quiz_queue = []
+    st.session_state.quiz_queue_key = None
+    st.session_state.quiz_queue_drawn_at = 0.0
+if st.session_state.get('progress_learner') != learner_id:
+    # Running totals start from the learner's stored aggregate and are then kept up to date per answer
+    st.session_state.quiz_total, st.session_state.quiz_score = progress_store.totals(learner_id)
+    st.session_state.progress_learner = learner_id
+if st.session_state.get('review_scheduler_version') != (vocabulary_version, learner_id):
+    # Spaced-repetition state for this learner, rebuilt when the vocabulary changes
+    st.session_state.review_scheduler = ReviewScheduler(quiz_pools.schedule_groups(), store=load_card_store(learner_id))
+    st.session_state.review_scheduler_version = (vocabulary_version, learner_id)
+    clear_quiz_question()
 if 'current_speech' not in st.session_state:
     st.session_state.current_speech = []
 if 'speech_settings' not in st.session_state:
     st.session_state.speech_settings = {'sentences': 5, 'speed': 'normal', 'include_pinyin': True}
+# Also catches swaps that never went through the upload widget (an edited or bookmarked ?vocabulary= link)
+if st.session_state.get('session_vocabulary_version') != vocabulary_version:
+    on_vocabulary_change()
+    st.session_state.session_vocabulary_version = vocabulary_version
+
+rerun_timer.mark("Audio cache")
+
+# Audio cache settings
+# Clips live under ./static so Streamlit's static file serving
+# (server.enableStaticServing in .streamlit/config.toml) can hand them to the browser by URL
+APP_STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", os.path.join(APP_STATIC_DIR, "audio"))
+AUDIO_MEMORY_CACHE_SIZE = 256  # clips kept in memory
+
+class AudioCache:
+    """Content-addressed MP3 store keyed by (text, lang, slow): files on disk plus an in-memory LRU"""
+
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_memory_items=AUDIO_MEMORY_CACHE_SIZE):
+        self.directory = directory
+        self.max_memory_items = max_memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.synthesized = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(text, lang='zh-tw', slow=False):
+        return hashlib.sha256(f"{lang}|{int(slow)}|{text}".encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def _load(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.disk_hits += 1
+        self._remember(key, data)
+        return data
+
+    def _store(self, key, data):
+        # Write atomically so concurrent readers never see a partial file
+        temp_path = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self.path(key))
+        self._remember(key, data)
+
+    def get(self, text, lang='zh-tw', slow=False):
+        """Cached MP3 bytes, or None if the clip was never synthesized"""
+        return self._load(self.key(text, lang, slow))
+
+    def get_or_create(self, text, lang='zh-tw', slow=False):
+        """Cached MP3 bytes, synthesizing and storing the clip on a miss"""
+        data = self.get(text, lang, slow)
+        if data is not None:
+            return data
+
+        tts = gTTS(text=text, lang=lang, slow=slow)
+        mp3_fp = BytesIO()
+        tts.write_to_fp(mp3_fp)
+        data = mp3_fp.getvalue()
+        self._store(self.key(text, lang, slow), data)
+        self.synthesized += 1
+        return data
+
+    def get_or_combine(self, texts, lang='zh-tw', slow=False):
+        """(key, MP3 bytes) for several texts played back to back.
+
+        MP3 is a stream of self-contained frames, so the per-text clips are
+        joined as-is (the way gTTS joins its own chunks), with no re-encoding.
+        """
+        key = hashlib.sha256("\n".join([f"speech|{lang}|{int(slow)}", *texts]).encode("utf-8")).hexdigest()
+        data = self._load(key)
+        if data is None:
+            data = b"".join(self.get_or_create(text, lang, slow) for text in texts)
+            self._store(key, data)
+        return key, data
+
+    def contains(self, text, lang='zh-tw', slow=False):
+        return os.path.exists(self.path(self.key(text, lang, slow)))
+
+    def url(self, key):
+        """Static URL of a stored clip, or None if the cache directory is not served by Streamlit"""
+        static_dir = os.path.realpath(APP_STATIC_DIR)
+        directory = os.path.realpath(self.directory)
+        if not st.get_option("server.enableStaticServing") or os.path.commonpath([static_dir, directory]) != static_dir:
+            return None
+        relative = os.path.relpath(self.path(key), static_dir).replace(os.sep, "/")
+        return f"app/static/{relative}"
+
+    def _source(self, key, data):
+        url = self.url(key)
+        if url:
+            return url
+        return f"data:audio/mp3;base64,{base64.b64encode(data).decode()}"
+
+    def source(self, text, lang='zh-tw', slow=False):
+        """Browser src for a clip: a stable content-hash URL, falling back to a base64 data URI"""
+        data = self.get_or_create(text, lang, slow)
+        return self._source(self.key(text, lang, slow), data)
+
+    def speech_source(self, texts, lang='zh-tw', slow=False):
+        """Browser src for several texts combined into one clip"""
+        return self._source(*self.get_or_combine(texts, lang, slow))
+
+class AudioPrewarmJob:
+    """Background thread that synthesizes every missing clip for a list of words"""
+
+    def __init__(self, cache, texts, lang='zh-tw'):
+        self.cache = cache
+        self.texts = texts
+        self.lang = lang
+        self.done = 0
+        self.failed = 0
+        self.finished = False
+        self._thread = threading.Thread(target=self._run, name="audio-prewarm", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for text in self.texts:
+            try:
+                if not self.cache.contains(text, self.lang):
+                    self.cache.get_or_create(text, self.lang)
+            except Exception:
+                self.failed += 1
+            self.done += 1
+        self.finished = True
+
+@st.cache_resource
+def get_audio_cache():
+    """Process-wide audio cache shared by every session"""
+    return AudioCache()
+
+@st.cache_resource(max_entries=4)
+def start_audio_prewarm(version, _frame):
+    """Start pre-generating audio for a vocabulary (once per vocabulary version)"""
+    texts = tuple(_frame["Traditional Chinese Word"].dropna().astype(str).unique())
+    return AudioPrewarmJob(get_audio_cache(), texts)
 
 # Function to generate audio safely
 def generate_audio_safely(text, lang='zh-tw', slow=False):
-    """Generate audio with error handling"""
+    """Generate audio with error handling and return its src (a cached static URL when possible)"""
     if not TTS_AVAILABLE:
         st.warning("🔇 Audio functionality is not available in this deployment.")
         return None
     
     try:
-        tts = gTTS(text=text, lang=lang, slow=slow)
-        mp3_fp = BytesIO()
-        tts.write_to_fp(mp3_fp)
-        mp3_fp.seek(0)
-        return base64.b64encode(mp3_fp.read()).decode()
+        return get_audio_cache().source(text, lang, slow)
     except Exception as e:
         st.error(f"❌ Error generating audio: {str(e)}")
         return None
 
+def generate_speech_audio_safely(texts, lang='zh-tw', slow=False):
+    """Combined audio for a whole speech, cached by its sentences and speed"""
+    if not TTS_AVAILABLE:
+        st.warning("🔇 Audio functionality is not available in this deployment.")
+        return None
+    
+    try:
+        return get_audio_cache().speech_source(texts, lang, slow)
+    except Exception as e:
+        st.error(f"❌ Error generating audio: {str(e)}")
+        return None
+
+# Pre-generate audio for the whole vocabulary in the background
+if TTS_AVAILABLE:
+    audio_prewarm = start_audio_prewarm(vocabulary_version, df)
+
+rerun_timer.mark("Header")
+
 # 🎨 Enhanced Custom CSS with beautiful aesthetics
-st.markdown("""
+PAGE_CSS = """
     <style>
     @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+TC:wght@300;400;500;700&family=Inter:wght@300;400;500;600;700&display=swap');
     
@@ -265,7 +683,7 @@ st.markdown("""
     footer {visibility: hidden;}
     header {visibility: hidden;}
     </style>
-""", unsafe_allow_html=True)
+"""
 
 # Enhanced floating characters with more variety
 characters = [
@@ -276,22 +694,26 @@ characters = [
     ("海", "Ocean"), ("山", "Mountain"), ("雲", "Cloud"), ("雨", "Rain")
 ]
 
-# Create floating characters with staggered timing
-for i in range(6):  # Reduced number for better performance
-    char, meaning = random.choice(characters)
-    delay = random.uniform(0, 15)
-    left_pos = random.randint(0, 95)
-    st.markdown(
-        f'''<div class="floating-text" style="
-            left:{left_pos}%; 
-            animation-delay: {delay}s;
-            font-size: {random.randint(28, 40)}px;
-        ">{char}</div>''',
-        unsafe_allow_html=True
-    )
+def build_header_html(seed):
+    """CSS, floating characters and title as one block, so a session re-sends identical markup on every rerun"""
+    rng = random.Random(seed)
+    floating = []
+    # Create floating characters with staggered timing
+    for i in range(6):  # Reduced number for better performance
+        char, meaning = rng.choice(characters)
+        delay = rng.uniform(0, 15)
+        left_pos = rng.randint(0, 95)
+        floating.append(
+            f'<div class="floating-text" style="left:{left_pos}%; animation-delay: {delay}s; '
+            f'font-size: {rng.randint(28, 40)}px;">{char}</div>'
+        )
+    # 🌟 Enhanced App Title
+    return PAGE_CSS + "".join(floating) + '<h1 class="main-title">🇹🇼 Learn Traditional Chinese</h1>'
 
-# 🌟 Enhanced App Title
-st.markdown('<h1 class="main-title">🇹🇼 Learn Traditional Chinese</h1>', unsafe_allow_html=True)
+# Decorations are seeded once per session, not re-randomized (and re-animated) on every rerun
+if 'header_html' not in st.session_state:
+    st.session_state.header_html = build_header_html(random.randrange(1 << 30))
+st.markdown(st.session_state.header_html, unsafe_allow_html=True)
 
 # Show deployment status
 if not TTS_AVAILABLE:
@@ -304,6 +726,8 @@ if not TTS_AVAILABLE:
 
 st.markdown('<p style="text-align: center; font-size: 1.2rem; color: rgba(255,255,255,0.9); font-weight: 500; margin-bottom: 2rem;">Discover the beauty of Traditional Chinese with interactive learning, quizzes & vocabulary practice</p>', unsafe_allow_html=True)
 
+rerun_timer.mark("Navigation and stats")
+
 # Navigation tabs
 col1, col2, col3, col4 = st.columns(4)
 
@@ -328,9 +752,9 @@ with col4:
         st.session_state.speech_active = False
 
 # Stats section
-total_words = len(df)
-categories = len(df["Category"].unique())
-speech_sentences = len(df[df["Category"].str.contains("speech", case=False, na=False)])
+total_words = vocabulary_stats["total_words"]
+categories = vocabulary_stats["categories"]
+speech_sentences = vocabulary_stats["speech_sentences"]
 accuracy = round((st.session_state.quiz_score / max(st.session_state.quiz_total, 1)) * 100, 1) if st.session_state.quiz_total > 0 else 0
 
 col1, col2, col3, col4, col5 = st.columns(5)
@@ -375,8 +799,13 @@ with col5:
         </div>
     ''', unsafe_allow_html=True)
 
+if TTS_AVAILABLE and not audio_prewarm.finished:
+    st.caption(f"🔊 Preparing audio: {audio_prewarm.done}/{len(audio_prewarm.texts)} words ready")
+
 st.markdown("<br>", unsafe_allow_html=True)
 
+rerun_timer.mark("Mode view")
+
 # Quiz Mode
 if st.session_state.quiz_active:
     st.markdown("""
@@ -415,29 +844,33 @@ if st.session_state.quiz_active:
                 🏆 Score: {st.session_state.quiz_score} / {st.session_state.quiz_total} ({accuracy}% Accuracy)
             </div>
         """, unsafe_allow_html=True)
+        review_stats = st.session_state.review_scheduler.stats(time.time())
+        st.caption(f"🗓️ Spaced repetition: {review_stats['due']} reviews due · {review_stats['seen']}/{review_stats['cards']} words seen")
+        with st.expander("📈 Accuracy by category"):
+            for category_name, answered, correct in progress_store.category_accuracy(learner_id):
+                st.markdown(f"**{category_name}**: {correct}/{answered} ({round(correct / answered * 100, 1)}%)")
     
     def generate_quiz_question():
-        # Filter dataframe based on category (exclude speech sentences from quiz)
-        quiz_df = df[~df["Category"].str.contains("speech", case=False, na=False)].copy()
-        if st.session_state.quiz_category != "All":
-            quiz_df = quiz_df[quiz_df["Category"] == st.session_state.quiz_category]
+        # Serve the next pre-drawn question, refilling the queue with the cards the spaced-repetition
+        # scheduler says are most due when it runs out, the settings change or it gets stale
+        now = time.time()
+        queue_key = (st.session_state.review_scheduler_version, st.session_state.quiz_category, st.session_state.quiz_difficulty)
+        if (not st.session_state.quiz_queue or st.session_state.quiz_queue_key != queue_key
+                or now - st.session_state.quiz_queue_drawn_at > QUIZ_QUEUE_MAX_AGE):
+            rows = st.session_state.review_scheduler.next_cards(st.session_state.quiz_category, now=now, count=QUIZ_QUEUE_SIZE)
+            questions = (quiz_pools.question(row, st.session_state.quiz_category, st.session_state.quiz_difficulty,
+                                             st.session_state.quiz_rng) for row in rows)
+            st.session_state.quiz_queue = [question for question in questions if question is not None]
+            st.session_state.quiz_queue_key = queue_key
+            st.session_state.quiz_queue_drawn_at = now
         
-        if len(quiz_df) == 0:
+        if not st.session_state.quiz_queue:
             return None
         
-        # Select correct answer
-        correct_word = quiz_df.sample(1).iloc[0]
-        st.session_state.current_question = correct_word
-        st.session_state.correct_answer = correct_word["English Word"]
-        
-        # Generate wrong options
-        num_options = 2 if st.session_state.quiz_difficulty == "Easy" else 3 if st.session_state.quiz_difficulty == "Medium" else 4
-        other_words = quiz_df[quiz_df["English Word"] != correct_word["English Word"]].sample(min(num_options - 1, len(quiz_df) - 1))
-        
-        # Create options list
-        options = [correct_word["English Word"]] + other_words["English Word"].tolist()
-        random.shuffle(options)
-        st.session_state.quiz_options = options
+        question = st.session_state.quiz_queue.pop(0)
+        st.session_state.current_question = question
+        st.session_state.correct_answer = question["English Word"]
+        st.session_state.quiz_options = question["options"]
         st.session_state.quiz_answered = False
     
     # Generate new question button
@@ -470,11 +903,11 @@ if st.session_state.quiz_active:
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
                 if st.button("🔊 Play Audio", key="quiz_audio", help="Listen to the pronunciation"):
-                    b64 = generate_audio_safely(question["Traditional Chinese Word"])
-                    if b64:
+                    audio_src = generate_audio_safely(question["Traditional Chinese Word"])
+                    if audio_src:
                         st.markdown(f"""
                             <audio autoplay="true">
-                                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
+                                <source src="{audio_src}" type="audio/mpeg">
                             </audio>
                         """, unsafe_allow_html=True)
         else:
@@ -492,6 +925,7 @@ if st.session_state.quiz_active:
             ):
                 st.session_state.quiz_answered = True
                 st.session_state.quiz_total += 1
+                record_quiz_answer(question, option == st.session_state.correct_answer)
                 
                 if option == st.session_state.correct_answer:
                     st.session_state.quiz_score += 1
@@ -512,6 +946,82 @@ if st.session_state.quiz_active:
             </div>
         """, unsafe_allow_html=True)
 
+# Speech Practice Mode
+elif st.session_state.speech_active:
+    st.markdown("""
+        <div style="background: rgba(255,255,255,0.9); backdrop-filter: blur(20px); border-radius: 25px; padding: 2rem; margin: 1rem 0; box-shadow: 0 15px 35px rgba(0,0,0,0.1);">
+            <h2 style="text-align: center; color: #2c3e50; font-family: 'Inter', sans-serif; font-weight: 800; margin-bottom: 2rem;">
+                🎤 Chinese Speech Practice
+            </h2>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    if len(speech_rows) == 0:
+        st.info("📝 No speech sentences found. Add rows whose Category contains \"Speech\" to your vocabulary file.")
+    else:
+        # Speech settings
+        settings = st.session_state.speech_settings
+        max_sentences = min(MAX_SPEECH_SENTENCES, len(speech_rows))
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            settings['sentences'] = st.slider(
+                "📝 Sentences per speech", 1, max_sentences, min(settings['sentences'], max_sentences),
+                help="How many sentences to practice at once"
+            )
+        
+        with col2:
+            settings['speed'] = st.radio(
+                "🐢 Speaking speed", list(SPEECH_SPEEDS), index=list(SPEECH_SPEEDS).index(settings['speed']),
+                horizontal=True, help="Slow speech is easier to follow"
+            )
+        
+        with col3:
+            settings['include_pinyin'] = st.checkbox("🔤 Show Pinyin", value=settings['include_pinyin'])
+        
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            if st.button("🎲 New Speech", key="new_speech", help="Draw a new set of sentences"):
+                picks = st.session_state.quiz_rng.choice(len(speech_rows), size=settings['sentences'], replace=False)
+                st.session_state.current_speech = speech_rows[picks].tolist()
+        
+        if st.session_state.current_speech:
+            speech = df.iloc[st.session_state.current_speech]
+            sentences_html = "".join(
+                f"""<div class="word-card">
+                    <div class="chinese-word">{number}. {chinese}</div>
+                    {f'<div class="pinyin-word">{pinyin}</div>' if settings['include_pinyin'] else ''}
+                    <div class="english-word">{english}</div>
+                </div>"""
+                for number, (chinese, pinyin, english) in enumerate(
+                    zip(escape_html(speech["Traditional Chinese Word"]), escape_html(speech["Pinyin"]), escape_html(speech["English Word"])), start=1
+                )
+            )
+            st.markdown(sentences_html, unsafe_allow_html=True)
+            
+            # One combined clip for the whole speech
+            if TTS_AVAILABLE:
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col2:
+                    if st.button("🔊 Play Whole Speech", key="play_speech", help="Listen to all sentences in order"):
+                        audio_src = generate_speech_audio_safely(speech["Traditional Chinese Word"].tolist(), slow=SPEECH_SPEEDS[settings['speed']])
+                        if audio_src:
+                            st.markdown(f"""
+                                <audio controls autoplay="true" style="width: 100%;">
+                                    <source src="{audio_src}" type="audio/mpeg">
+                                </audio>
+                            """, unsafe_allow_html=True)
+            else:
+                st.info("🔇 Audio not available - read the sentences aloud using the Pinyin guide!")
+        else:
+            st.markdown("""
+                <div style="text-align: center; padding: 3rem; background: rgba(255,255,255,0.9); border-radius: 20px; margin: 2rem 0;">
+                    <div style="font-size: 4rem; margin-bottom: 1rem;">🎤</div>
+                    <h3 style="color: #2c3e50; font-family: 'Inter', sans-serif; font-weight: 600;">Ready to Practice Speaking?</h3>
+                    <p style="color: #7f8c8d; font-family: 'Inter', sans-serif; margin: 1rem 0;">Click "New Speech" to get a set of sentences to read aloud!</p>
+                </div>
+            """, unsafe_allow_html=True)
+
 # Learning Mode (Dictionary/Browse)
 else:
     # Enhanced search and filter section
@@ -537,84 +1047,79 @@ else:
             help="Type any part of a word to find it instantly"
         )
 
-    # Filter dataframe
-    filtered_df = df.copy()
-    if category != "All":
-        filtered_df = filtered_df[filtered_df["Category"] == category]
+    # Filter dataframe (search through the prebuilt index instead of scanning every column)
+    filtered_df = filter_vocabulary(df, search_index, category, search_word)
 
-    if search_word:
-        filtered_df = filtered_df[
-            filtered_df["English Word"].str.contains(search_word, case=False, na=False) |
-            filtered_df["Traditional Chinese Word"].str.contains(search_word, case=False, na=False) |
-            filtered_df["Pinyin"].str.contains(search_word, case=False, na=False)
-        ]
+    # Pagination: only one page of cards is rendered, so the widget count stays fixed
+    col1, col2, col3, col4 = st.columns([1, 2, 2, 1])
+    with col3:
+        page_size = st.selectbox("📄 Cards per page", CARD_PAGE_SIZES, index=CARD_PAGE_SIZES.index(DEFAULT_CARD_PAGE_SIZE), key="learn_page_size")
+    page_count = max(1, -(-len(filtered_df) // page_size))
+    
+    # Jump back to the first page whenever the filter or page size changes
+    filter_key = (category, search_word.strip(), page_size)
+    if st.session_state.get("learn_filter") != filter_key:
+        st.session_state.learn_filter = filter_key
+        st.session_state.learn_page = 1
+    st.session_state.learn_page = min(max(st.session_state.get("learn_page", 1), 1), page_count)
+    
+    with col1:
+        st.button("◀ Previous", key="learn_prev", on_click=change_learn_page, args=(-1, page_count), disabled=st.session_state.learn_page <= 1)
+    with col2:
+        page = st.number_input("📖 Page", min_value=1, max_value=page_count, step=1, key="learn_page")
+    with col4:
+        st.button("Next ▶", key="learn_next", on_click=change_learn_page, args=(1, page_count), disabled=st.session_state.learn_page >= page_count)
+    
+    first = (page - 1) * page_size
+    page_df = filtered_df.iloc[first:first + page_size]
 
     # Results info
     st.markdown(f"""
         <div style="text-align: center; margin: 2rem 0;">
             <span style="background: linear-gradient(45deg, #667eea, #764ba2); color: white; padding: 0.5rem 1.5rem; border-radius: 25px; font-weight: 600; font-family: 'Inter', sans-serif; box-shadow: 0 8px 25px rgba(102, 126, 234, 0.3);">
-                📖 Showing {len(filtered_df)} words
+                📖 Showing {first + 1 if len(page_df) else 0}-{first + len(page_df)} of {len(filtered_df)} words
             </span>
         </div>
     """, unsafe_allow_html=True)
 
     # Enhanced word cards
-    if len(filtered_df) > 0:
-        for i, row in filtered_df.iterrows():
-            # Color schemes for categories
-            color_schemes = {
-                "Greetings": ["#ff6b6b", "#ffa726"],
-                "Family": ["#4ecdc4", "#45b7d1"],
-                "Food": ["#f093fb", "#f5576c"],
-                "Numbers": ["#a8e6cf", "#56ab91"],
-                "Colors": ["#ff8a80", "#ffab91"],
-                "Animals": ["#ce93d8", "#ba68c8"],
-                "Time": ["#90caf9", "#42a5f5"],
-                "Weather": ["#fff176", "#ffcc02"]
-            }
-            
-            category_colors = color_schemes.get(row["Category"], ["#667eea", "#764ba2"])
-            
-            st.markdown(f"""
-                <div class="word-card" style="border-left: 5px solid {category_colors[0]};">
-                    <div style="display: flex; justify-content: space-between; align-items: center; flex-wrap: wrap; gap: 1rem;">
-                        <div style="flex: 1; min-width: 200px;">
-                            <div class="english-word">{row["English Word"]}</div>
-                            <div class="chinese-word">{row["Traditional Chinese Word"]}</div>
-                            <div class="pinyin-word">{row["Pinyin"]}</div>
-                            <div style="margin-top: 1rem;">
-                                <span class="category-tag" style="background: linear-gradient(45deg, {category_colors[0]}, {category_colors[1]});">
-                                    {row["Category"]}
-                                </span>
+    if len(page_df) > 0:
+        # One pronunciation picker for the page instead of a button per card
+        if TTS_AVAILABLE:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                listen_row = st.selectbox(
+                    "🔊 Pronounce a word from this page",
+                    range(len(page_df)),
+                    format_func=lambda position: f'{page_df["Traditional Chinese Word"].iat[position]} ({page_df["English Word"].iat[position]})',
+                    key="learn_listen_word"
+                )
+            with col2:
+                st.markdown('<div style="height: 1.75rem;"></div>', unsafe_allow_html=True)
+                listen_clicked = st.button("🔊 Listen", key="learn_listen", help="Click to hear pronunciation")
+            if listen_clicked:
+                word = page_df["Traditional Chinese Word"].iat[listen_row]
+                audio_src = generate_audio_safely(word)
+                if audio_src:
+                    st.markdown(f"""
+                        <div style="text-align: center; margin: 1rem 0;">
+                            <div style="background: linear-gradient(45deg, #4facfe, #00f2fe); color: white; padding: 1rem 2rem; border-radius: 25px; display: inline-block; box-shadow: 0 10px 30px rgba(79, 172, 254, 0.3);">
+                                🎵 Playing: <strong>{word}</strong>
                             </div>
                         </div>
-                        <div style="display: flex; align-items: center;">
+                        <audio autoplay="true">
+                            <source src="{audio_src}" type="audio/mpeg">
+                        </audio>
+                    """, unsafe_allow_html=True)
+                    st.success("🎉 Audio played successfully!")
+        else:
+            st.markdown("""
+                <button class="audio-disabled" disabled>
+                    🔇 Audio Disabled
+                </button>
             """, unsafe_allow_html=True)
-            
-            # Enhanced audio button
-            if TTS_AVAILABLE:
-                if st.button("🔊 Listen", key=f"btn_{i}", help="Click to hear pronunciation"):
-                    b64 = generate_audio_safely(row["Traditional Chinese Word"])
-                    if b64:
-                        st.markdown(f"""
-                            <div style="text-align: center; margin: 1rem 0;">
-                                <div style="background: linear-gradient(45deg, #4facfe, #00f2fe); color: white; padding: 1rem 2rem; border-radius: 25px; display: inline-block; box-shadow: 0 10px 30px rgba(79, 172, 254, 0.3);">
-                                    🎵 Playing: <strong>{row["Traditional Chinese Word"]}</strong>
-                                </div>
-                            </div>
-                            <audio autoplay="true">
-                                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-                            </audio>
-                        """, unsafe_allow_html=True)
-                        st.success("🎉 Audio played successfully!")
-            else:
-                st.markdown("""
-                    <button class="audio-disabled" disabled>
-                        🔇 Audio Disabled
-                    </button>
-                """, unsafe_allow_html=True)
-            
-            st.markdown("</div></div></div>", unsafe_allow_html=True)
+        
+        st.markdown(build_word_cards_html(page_df), unsafe_allow_html=True)
 
     else:
         # No results found
@@ -643,6 +1148,8 @@ else:
             </div>
         """, unsafe_allow_html=True)
 
+rerun_timer.mark("Footer and upload")
+
 # Footer with additional features
 st.markdown("<br><br>", unsafe_allow_html=True)
 st.markdown("""
@@ -676,43 +1183,64 @@ if st.session_state.quiz_total > 0:
         if st.button("🔄 Reset Quiz Progress", help="Clear your quiz history and start fresh"):
             st.session_state.quiz_score = 0
             st.session_state.quiz_total = 0
-            st.session_state.current_question = None
-            st.session_state.quiz_answered = False
-            st.success("✅ Quiz progress has been reset!")
-            time.sleep(1)
+            st.session_state.review_scheduler = ReviewScheduler(quiz_pools.schedule_groups())
+            progress_store.reset(learner_id)
+            clear_quiz_question()
+            st.toast("✅ Quiz progress has been reset!")
             st.rerun()
 
 # File upload section for custom vocabulary
 st.markdown("<br>", unsafe_allow_html=True)
-st.markdown("""
+st.markdown(f"""
     <div style="background: rgba(255,255,255,0.9); backdrop-filter: blur(20px); border-radius: 20px; padding: 2rem; margin: 2rem 0; text-align: center; box-shadow: 0 15px 35px rgba(0,0,0,0.1);">
         <h4 style="color: #2c3e50; font-family: 'Inter', sans-serif; font-weight: 700; margin-bottom: 1rem;">📁 Upload Your Own Vocabulary</h4>
-        <p style="color: #7f8c8d; margin-bottom: 1.5rem;">Upload an Excel file (.xlsx) with columns: English Word, Traditional Chinese Word, Pinyin, Category</p>
+        <p style="color: #7f8c8d; margin-bottom: 1.5rem;">Upload an {UPLOAD_TYPE_NAMES} file with columns: English Word, Traditional Chinese Word, Pinyin, Category</p>
     </div>
 """, unsafe_allow_html=True)
 
 uploaded_file = st.file_uploader(
     "Choose your vocabulary file", 
-    type=['xlsx'],
-    help="Upload an Excel file with your Chinese vocabulary"
+    type=UPLOAD_TYPES,
+    help=f"Upload an {UPLOAD_TYPE_NAMES} file with your Chinese vocabulary"
 )
 
-if uploaded_file is not None:
+# Each uploaded file is ingested once, not on every rerun while the widget still holds it
+if uploaded_file is not None and st.session_state.get('ingested_upload') != uploaded_file.file_id:
+    st.session_state.ingested_upload = uploaded_file.file_id
     try:
-        new_df = pd.read_excel(uploaded_file)
-        required_columns = ['English Word', 'Traditional Chinese Word', 'Pinyin', 'Category']
-        
-        if all(col in new_df.columns for col in required_columns):
-            df = new_df  # Replace the dataframe
-            st.success(f"✅ Successfully loaded {len(df)} words from your file!")
-            st.balloons()
-            time.sleep(1)
-            st.rerun()
-        else:
-            st.error(f"❌ Missing required columns. Please ensure your Excel file has: {', '.join(required_columns)}")
+        new_id = ingest_upload(uploaded_file.name, uploaded_file.getvalue())
+        new_version = f"upload:{new_id}"
+        if new_version != vocabulary_version:
+            new_df = load_uploaded_vocabulary(new_id)
             
+            # Diff against the current vocabulary so the search index only tokenizes new or edited rows
+            remap = match_rows(df, new_df)
+            get_search_index(new_version, new_df, search_index, remap)
+            unchanged = int((remap >= 0).sum())
+            st.session_state.vocabulary_diff = {
+                "words": len(new_df),
+                "added": len(new_df) - unchanged,
+                "removed": len(df) - unchanged,
+                "unchanged": unchanged,
+            }
+            st.query_params["vocabulary"] = new_id
+            on_vocabulary_change()
+            st.rerun()
+        st.info("ℹ️ This vocabulary is already loaded.")
     except Exception as e:
-        st.error(f"❌ Error reading file: {str(e)}")
+        st.error(f"❌ Error reading file: {str(e)}. Please ensure your file has: {', '.join(REQUIRED_COLUMNS)}")
+
+if 'vocabulary_diff' in st.session_state:
+    diff = st.session_state.pop('vocabulary_diff')
+    st.success(f"✅ Successfully loaded {diff['words']} words from your file! "
+               f"({diff['added']} new or edited, {diff['removed']} removed, {diff['unchanged']} unchanged)")
+    st.balloons()
+
+if vocabulary_version.startswith("upload:"):
+    if st.button("↩️ Use the default vocabulary", key="default_vocabulary"):
+        del st.query_params["vocabulary"]
+        on_vocabulary_change()
+        st.rerun()
 
 # Deployment instructions
 with st.expander("🚀 Deployment Help"):
@@ -721,6 +1249,7 @@ with st.expander("🚀 Deployment Help"):
     
     **1. Requirements.txt Issues:**
     - Make sure `gTTS==2.5.1` is in your requirements.txt
+    - Keep `pyarrow` in requirements.txt for Parquet uploads and snapshots
     - Remove the `runtime.txt` file (it's not needed)
     
     **2. Missing Excel File:**
@@ -730,6 +1259,7 @@ with st.expander("🚀 Deployment Help"):
     **3. Audio Not Working:**
     - This version includes fallback modes when gTTS isn't available
     - The app will work without audio features in deployment environments
+    - Clips are cached in `static/audio/` and served by URL; keep `.streamlit/config.toml` (with `enableStaticServing = true`) in the repository, otherwise audio falls back to inline data
     
     **4. For Streamlit Cloud:**
     ```
@@ -749,11 +1279,18 @@ with st.expander("🚀 Deployment Help"):
     ```
     your-repo/
     ├── streamlit_app.py
+    ├── vocabulary.py
+    ├── spaced_repetition.py
+    ├── progress_store.py
     ├── requirements.txt
+    ├── .streamlit/config.toml
     ├── china.xlsx (optional)
     └── packages.txt (only if needed: ffmpeg)
     ```
     """)
 
-# Progressive loading animation for better UX
-time.sleep(0.1)
+# Per-section rerun timings
+if RERUN_TIMING or st.query_params.get("timing") == "1":
+    if 'rerun_timings' not in st.session_state:
+        st.session_state.rerun_timings = []
+    rerun_timer.render(st.session_state.rerun_timings)
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import load_analyzer_module  # noqa: E402
+from translation_stub import TranslationStub, point_analyzer_at  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def analyzer():
+    """The analyzer script loaded as a module (once: loading it builds the segmenter)"""
+    return load_analyzer_module()
+
+
+@pytest.fixture
+def stub(analyzer):
+    """Translation stub with the analyzer's online lookups routed to it and fresh breakers"""
+    server = TranslationStub().start()
+    point_analyzer_at(analyzer, server, timeout=0.5)
+    yield server
+    server.stop()
+    analyzer.reset_circuit_breakers()
@@ -0,0 +1,79 @@
+"""Quiz state in the vocabulary app when the vocabulary changes under an open question."""
+import os
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from vocabulary import SNAPSHOT_FORMAT, prepare_vocabulary, write_snapshot
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+SMALL_UPLOAD_ID = "0123456789abcdef"
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROGRESS_DB_FILE", str(tmp_path / "progress.sqlite3"))
+    monkeypatch.setenv("AUDIO_CACHE_DIR", str(tmp_path / "audio"))
+    monkeypatch.setenv("VOCABULARY_UPLOAD_DIR", str(tmp_path / "uploads"))
+    os.makedirs(tmp_path / "uploads")
+    small = prepare_vocabulary(pd.DataFrame({
+        "English Word": ["Water", "Tea"],
+        "Traditional Chinese Word": ["水", "茶"],
+        "Pinyin": ["shuǐ", "chá"],
+        "Category": ["Drinks", "Drinks"],
+    }))
+    write_snapshot(small, str(tmp_path / "uploads" / f"{SMALL_UPLOAD_ID}.{SNAPSHOT_FORMAT}"), SMALL_UPLOAD_ID)
+
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    at.query_params["learner"] = "swap-test"
+    at.run()
+    at.button(key="quiz_tab").click().run()
+    return at
+
+
+def option_buttons(at):
+    return [button for button in at.button if button.key and button.key.startswith("option_")]
+
+
+def test_vocabulary_swap_clears_the_open_question(app):
+    app.button(key="new_question").click().run()
+    assert app.session_state.current_question is not None
+    assert option_buttons(app)
+
+    app.query_params["vocabulary"] = SMALL_UPLOAD_ID
+    app.run()
+    assert not app.exception
+    assert app.session_state.current_question is None
+    assert not option_buttons(app)
+
+    app.button(key="new_question").click().run()
+    assert app.session_state.current_question["Traditional Chinese Word"] in ("水", "茶")
+    answered = app.session_state.quiz_total
+    option_buttons(app)[0].click().run()
+    assert not app.exception
+    assert app.session_state.quiz_total == answered + 1
+
+
+def test_returning_to_the_default_vocabulary_clears_the_open_question(app):
+    app.query_params["vocabulary"] = SMALL_UPLOAD_ID
+    app.run()
+    app.button(key="new_question").click().run()
+    assert app.session_state.current_question is not None
+
+    app.button(key="default_vocabulary").click().run()
+    assert not app.exception
+    assert "vocabulary" not in app.query_params
+    assert app.session_state.current_question is None
+    assert not option_buttons(app)
+
+
+def test_new_question_is_served_from_a_pre_drawn_queue(app):
+    app.button(key="new_question").click().run()
+    queue = app.session_state.quiz_queue
+    rows = [app.session_state.current_question["row"]] + [question["row"] for question in queue]
+    assert len(queue) >= 1
+    assert len(set(rows)) == len(rows)
+
+    app.button(key="new_question").click().run()
+    assert app.session_state.current_question["row"] == rows[1]
@@ -0,0 +1,55 @@
+"""Incremental re-analysis: only edited sentences are segmented and looked up again."""
+TEXT = "我們今天去公園。你好嗎？他不是老師，她是學生。"
+EDITED = "我們今天去公園。你好嗎？他不是醫生，她是學生。"
+
+
+def test_incremental_matches_full_analysis(analyzer, stub):
+    words, sentence = analyzer.EnhancedChineseAnalyzer().analyze_text(TEXT)
+    cache = analyzer.SentenceAnalysisCache()
+    incremental_words, incremental_sentence = analyzer.EnhancedChineseAnalyzer().analyze_text(TEXT, sentence_cache=cache)
+
+    assert incremental_words == words
+    assert incremental_sentence["pinyin"] == sentence["pinyin"]
+    # The meaning is joined from per-sentence translations so an edit re-translates one sentence
+    assert incremental_sentence["meaning"] == " ".join(
+        f"translation of {part}" for part in ("我們今天去公園。", "你好嗎？", "他不是老師，她是學生。"))
+    assert (cache.hits, cache.misses, len(cache)) == (0, 3, 3)
+
+
+def test_edit_reanalyzes_only_the_changed_sentence(analyzer, stub, monkeypatch):
+    analyzer_instance = analyzer.EnhancedChineseAnalyzer()
+    cache = analyzer.SentenceAnalysisCache()
+    analyzer_instance.analyze_text(TEXT, sentence_cache=cache)
+
+    segmented = []
+    segment_sentences = analyzer.segment_sentences
+
+    def recording_segment_sentences(sentences):
+        segmented.extend(sentences)
+        return segment_sentences(sentences)
+
+    monkeypatch.setattr(analyzer, "segment_sentences", recording_segment_sentences)
+    events = list(analyzer_instance.analyze_text_incremental(EDITED, cache))
+
+    assert segmented == ["他不是醫生，她是學生。"]
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert events[0]["type"] == "segmentation"
+    assert (events[0]["sentences"], events[0]["reused_sentences"]) == (3, 2)
+
+    words, sentence = analyzer.EnhancedChineseAnalyzer().analyze_text(EDITED)
+    analysis = [None] * len(events[0]["words"])
+    for event in events:
+        if event["type"] == "word":
+            analysis[event["index"]] = event["analysis"]
+    assert analysis == words
+    assert events[-1]["analysis"]["pinyin"] == sentence["pinyin"]
+
+
+def test_unchanged_text_makes_no_upstream_requests(analyzer, stub):
+    analyzer_instance = analyzer.EnhancedChineseAnalyzer()
+    cache = analyzer.SentenceAnalysisCache()
+    first = analyzer_instance.analyze_text(TEXT, sentence_cache=cache)
+    before = dict(stub.request_counts)
+    assert analyzer_instance.analyze_text(TEXT, sentence_cache=cache) == first
+    assert stub.request_counts == before
+    assert cache.hits == 3
@@ -0,0 +1,35 @@
+"""Offline dictionary backends: the parsed CC-CEDICT file and the compiled memory-mapped lexicon."""
+import os
+
+import pytest
+
+CEDICT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cedict_subset.u8")
+WORDS = ["你好", "銀行", "行走", "不", "一個", "學生", "不存在"]
+
+
+@pytest.fixture(scope="module")
+def backends(analyzer, tmp_path_factory):
+    compiled = str(tmp_path_factory.mktemp("lexicon") / "cedict.lex")
+    assert analyzer.build_lexicon(CEDICT_FILE, compiled) > 0
+    return analyzer.CedictDictionary(CEDICT_FILE), analyzer.MmapLexicon(compiled)
+
+
+def test_lexicon_base_class_is_abstract(analyzer):
+    with pytest.raises(TypeError):
+        analyzer.Lexicon()
+
+
+def test_compiled_lexicon_answers_like_the_parsed_dictionary(backends):
+    parsed, compiled = backends
+    assert compiled.max_word_length == parsed.max_word_length
+    for word in WORDS:
+        assert compiled.lookup(word) == parsed.lookup(word), word
+        assert compiled.get_pinyin(word) == parsed.get_pinyin(word), word
+        assert compiled.get_gloss(word) == parsed.get_gloss(word), word
+        assert (word in compiled) == (word in parsed)
+
+
+def test_heteronyms_are_read_in_word_context(backends):
+    for lexicon in backends:
+        assert lexicon.get_pinyin("銀行") == "yín háng"
+        assert lexicon.get_pinyin("行走") == "xíng zǒu"
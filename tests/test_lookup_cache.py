@@ -0,0 +1,78 @@
+"""LookupCache: LRU order, size bound and TTL expiry."""
+import threading
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted_first(analyzer):
+    cache = analyzer.LookupCache(max_entries=3, ttl_seconds=0)
+    for key in "abc":
+        cache.put(key, key.upper())
+    assert cache.get("a") == "A"  # a is now the most recently used
+    cache.put("d", "D")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+    assert cache.evictions == 1
+
+
+def test_size_never_exceeds_the_limit(analyzer):
+    cache = analyzer.LookupCache(max_entries=50, ttl_seconds=0)
+    for i in range(500):
+        cache.put(f"key{i}", str(i))
+        assert len(cache) <= 50
+    assert cache.evictions == 450
+    assert cache.stats()["entries"] == 50
+
+
+def test_entries_expire_after_their_ttl(analyzer):
+    clock = FakeClock()
+    cache = analyzer.LookupCache(max_entries=10, ttl_seconds=60, clock=clock)
+    cache.put("short", "1", ttl_seconds=5)
+    cache.put("default", "2")
+    cache.put("forever", "3", ttl_seconds=0)
+
+    clock.now += 5
+    assert cache.get("short") == "1"
+    clock.now += 1
+    assert cache.get("short") is None
+    assert cache.get("default") == "2"
+    clock.now += 60
+    assert cache.get("default") is None
+    clock.now += 10 ** 6
+    assert cache.get("forever") == "3"
+    assert cache.expirations == 2
+    assert len(cache) == 1
+
+
+def test_counters_and_hit_rate(analyzer):
+    cache = analyzer.LookupCache(max_entries=10)
+    cache.put("a", "A")
+    cache.get("a")
+    cache.get("a")
+    cache.get("missing")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == 2 / 3
+
+
+def test_concurrent_puts_respect_the_limit(analyzer):
+    cache = analyzer.LookupCache(max_entries=100, ttl_seconds=0)
+
+    def fill(prefix):
+        for i in range(1000):
+            cache.put(f"{prefix}{i}", "x")
+            cache.get(f"{prefix}{i // 2}")
+
+    threads = [threading.Thread(target=fill, args=(prefix,)) for prefix in "abcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(cache) == 100
+    assert cache.evictions == 4000 - 100
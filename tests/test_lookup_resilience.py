@@ -0,0 +1,104 @@
+"""Circuit breaker and negative cache behavior of the online lookups, against the local stub."""
+import time
+
+import pytest
+
+from translation_stub import offline_free_converter
+
+
+def fail_google(analyzer, converter, stub):
+    """Make Google fail until its breaker opens; returns the breaker"""
+    stub.configure("google", error_rate=1.0, error_status=503)
+    for i in range(analyzer.BREAKER_FAILURE_THRESHOLD):
+        converter.translate_text(f"故障{i}")
+    return analyzer.get_circuit_breaker(stub.google_url)
+
+
+def test_breaker_opens_after_consecutive_failures(analyzer, stub):
+    converter = offline_free_converter(analyzer)
+    breaker = fail_google(analyzer, converter, stub)
+    assert breaker.state == "open"
+
+    before = stub.request_counts["google"]
+    with pytest.raises(analyzer.CircuitOpenError):
+        converter._http_get(stub.google_url, params={"q": "跳过"}, timeout=0.5)
+    assert stub.request_counts["google"] == before
+    assert breaker.short_circuits >= 1
+
+
+def test_half_open_trial_success_closes_breaker(analyzer, stub):
+    converter = offline_free_converter(analyzer)
+    breaker = fail_google(analyzer, converter, stub)
+    breaker.reset_timeout = 0.1
+    stub.configure("google")
+    time.sleep(0.2)
+
+    before = stub.request_counts["google"]
+    assert converter.translate_text("恢复").startswith("translation of")
+    assert stub.request_counts["google"] == before + 1
+    assert breaker.state == "closed"
+    assert breaker.consecutive_failures == 0
+
+
+def test_half_open_trial_failure_reopens_breaker(analyzer, stub):
+    converter = offline_free_converter(analyzer)
+    breaker = fail_google(analyzer, converter, stub)
+    breaker.reset_timeout = 0.1
+    time.sleep(0.2)
+
+    assert breaker.allow_request()
+    assert breaker.state == "half_open"
+    assert not breaker.allow_request()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_trial_interrupted_by_other_exception_is_released(analyzer, stub, monkeypatch):
+    converter = offline_free_converter(analyzer)
+    breaker = fail_google(analyzer, converter, stub)
+    breaker.reset_timeout = 0.1
+    time.sleep(0.2)
+
+    def broken_get(*args, **kwargs):
+        raise ValueError("not a RequestException")
+
+    monkeypatch.setattr(converter.session, "get", broken_get)
+    with pytest.raises(ValueError):
+        converter._http_get(stub.google_url, params={"q": "中断"}, timeout=0.5)
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+
+
+def test_breakers_are_per_endpoint(analyzer, stub):
+    converter = offline_free_converter(analyzer)
+    fail_google(analyzer, converter, stub)
+    assert analyzer.get_circuit_breaker(stub.mymemory_url).state == "closed"
+    assert set(analyzer.circuit_breaker_stats()) >= {stub.google_url}
+
+
+def test_negative_cache_skips_source_until_ttl_expires(analyzer, stub):
+    stub.configure("google", empty=True)
+    stub.configure("mymemory", empty=True)
+    converter = offline_free_converter(analyzer)
+    converter.negative_cache = analyzer.LookupCache(ttl_seconds=0.2)
+
+    assert converter.translate_text("否定") == analyzer.TRANSLATION_UNAVAILABLE
+    before = dict(stub.request_counts)
+    converter.translation_cache.clear()
+    assert converter.translate_text("否定") == analyzer.TRANSLATION_UNAVAILABLE
+    assert stub.request_counts == before
+
+    time.sleep(0.3)
+    converter.translation_cache.clear()
+    converter.translate_text("否定")
+    assert stub.request_counts["google"] > before["google"]
+
+
+def test_negative_cache_is_per_text(analyzer, stub):
+    stub.configure("google", empty=True)
+    converter = offline_free_converter(analyzer)
+    converter.translate_text("空白")
+
+    stub.configure("google")
+    assert converter.translate_text("其他").startswith("translation of")
+
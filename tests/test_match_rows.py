@@ -0,0 +1,45 @@
+"""match_rows: which rows of the previous vocabulary survive, and where they moved."""
+import pandas as pd
+
+from vocabulary import REQUIRED_COLUMNS, match_rows, prepare_vocabulary
+
+
+def vocabulary(*rows):
+    """Frame of (English, Hanzi, pinyin, category) rows"""
+    return prepare_vocabulary(pd.DataFrame(list(rows), columns=REQUIRED_COLUMNS))
+
+
+WATER = ("Water", "水", "shuǐ", "Drinks")
+TEA = ("Tea", "茶", "chá", "Drinks")
+RICE = ("Rice", "飯", "fàn", "Food")
+FISH = ("Fish", "魚", "yú", "Food")
+
+
+def test_identical_vocabulary_maps_every_row_to_itself():
+    frame = vocabulary(WATER, TEA, RICE)
+    assert match_rows(frame, frame).tolist() == [0, 1, 2]
+
+
+def test_reordered_rows_follow_their_new_positions():
+    assert match_rows(vocabulary(WATER, TEA, RICE), vocabulary(RICE, WATER, TEA)).tolist() == [1, 2, 0]
+
+
+def test_removed_and_edited_rows_are_unmatched():
+    old = vocabulary(WATER, TEA, RICE)
+    new = vocabulary(("Water", "水", "shuǐ", "Basics"), RICE, FISH)
+    assert match_rows(old, new).tolist() == [-1, -1, 1]
+
+
+def test_duplicate_rows_are_matched_one_to_one():
+    old = vocabulary(TEA, WATER, TEA, TEA)
+    new = vocabulary(WATER, TEA, RICE, TEA)
+    remap = match_rows(old, new)
+    assert remap.tolist() == [1, 0, 3, -1]
+    matched = remap[remap >= 0]
+    assert len(set(matched.tolist())) == len(matched)
+
+
+def test_empty_vocabularies():
+    empty = vocabulary()
+    assert match_rows(empty, vocabulary(WATER)).tolist() == []
+    assert match_rows(vocabulary(WATER), empty).tolist() == [-1]
@@ -0,0 +1,108 @@
+"""PersistentLookupStore and its WriteBehindQueue against a temporary SQLite database."""
+import sqlite3
+
+import write_behind
+from translation_stub import offline_free_converter
+from write_behind import WriteBehindQueue
+
+
+def test_round_trip_survives_reopening(analyzer, tmp_path):
+    path = str(tmp_path / "lookups.sqlite3")
+    store = analyzer.PersistentLookupStore(path)
+    store.put("你好", "pinyin", "google", "nǐ hǎo")
+    store.put("你好", "translation", "google", "hello")
+    store.close()
+
+    reopened = analyzer.PersistentLookupStore(path)
+    assert reopened.get("你好", "pinyin") == "nǐ hǎo"
+    assert reopened.get("你好", "translation") == "hello"
+    assert reopened.get("再見", "pinyin") is None
+    assert len(reopened) == 2
+    reopened.close()
+
+
+def test_latest_value_wins_and_hits_order_warm_entries(analyzer, tmp_path):
+    path = str(tmp_path / "lookups.sqlite3")
+    store = analyzer.PersistentLookupStore(path)
+    store.put("好", "pinyin", "google", "hao")
+    store.put("水", "pinyin", "google", "shuǐ")
+    store.put("好", "pinyin", "google", "hǎo")
+    store.close()
+
+    store = analyzer.PersistentLookupStore(path)
+    for _ in range(3):
+        store.get("水", "pinyin")
+    store.get("好", "pinyin")
+    store.close()
+
+    store = analyzer.PersistentLookupStore(path)
+    assert store.warm_entries() == [("水", "pinyin", "shuǐ"), ("好", "pinyin", "hǎo")]
+    store.close()
+
+
+def test_close_flushes_every_queued_write(analyzer, tmp_path):
+    path = str(tmp_path / "lookups.sqlite3")
+    store = analyzer.PersistentLookupStore(path)
+    count = analyzer.STORE_BATCH_SIZE * 2 + 7
+    for i in range(count):
+        store.put(f"詞{i}", "translation", "google", f"word {i}")
+    store.close()
+
+    assert store.pending() == 0
+    assert store.writes == count
+    rows = sqlite3.connect(path).execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+    assert rows == count
+
+
+def test_failed_lookups_are_never_persisted(analyzer, stub, tmp_path):
+    path = str(tmp_path / "lookups.sqlite3")
+    store = analyzer.PersistentLookupStore(path)
+    converter = offline_free_converter(analyzer)
+    converter.store = store
+
+    stub.configure("google", empty=True)
+    stub.configure("mymemory", empty=True)
+    assert converter.translate_text("失敗") == analyzer.TRANSLATION_UNAVAILABLE
+    assert converter._is_failure("pinyin", converter.get_comprehensive_pinyin("龘"))
+
+    stub.configure("google")
+    assert converter.translate_text("成功") == "translation of 成功"
+    store.close()
+
+    rows = sqlite3.connect(path).execute("SELECT text, kind, source, value FROM lookups").fetchall()
+    assert rows == [("成功", "translation", "google", "translation of 成功")]
+
+
+def test_failed_batch_is_retried_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "WRITE_RETRY_BASE_DELAY", 0.01)
+    path = str(tmp_path / "queue.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE items (value TEXT)")
+    connection.commit()
+    attempts = []
+
+    def flaky_apply(writer, batch):
+        attempts.append(len(batch))
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("database is locked")
+        writer.executemany("INSERT INTO items VALUES (?)", [(item,) for item in batch])
+
+    queue = WriteBehindQueue(path, flaky_apply, "test", flush_interval=0.05)
+    for item in "abc":
+        queue.put(item)
+    queue.close()
+
+    assert queue.failures == 2 and queue.dropped == 0 and queue.written == 3
+    assert [row[0] for row in connection.execute("SELECT value FROM items ORDER BY rowid")] == ["a", "b", "c"]
+
+
+def test_batch_is_dropped_after_max_retries(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "WRITE_RETRY_BASE_DELAY", 0.01)
+
+    def broken_apply(writer, batch):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    queue = WriteBehindQueue(str(tmp_path / "queue.sqlite3"), broken_apply, "test", flush_interval=0.05, max_retries=2)
+    queue.put("lost")
+    queue.close()
+    assert (queue.failures, queue.dropped, queue.written) == (3, 1, 0)
@@ -0,0 +1,113 @@
+"""ReviewScheduler picks cards in due order, per group, against a brute-force reference."""
+import numpy as np
+
+from spaced_repetition import ALL_GROUPS, DAY, RELEARN_DELAY, CardStore, ReviewScheduler
+
+
+def expected_next(scheduler, group, now):
+    """Reference choice by scanning every card: (kind, card) where kind is 'due', 'new' or 'upcoming'"""
+    store = scheduler.store
+    cards = [card for card, card_group in enumerate(scheduler.groups)
+             if card_group is not None and (group == ALL_GROUPS or card_group == group)]
+    seen = [card for card in cards if store.reviews[card] > 0]
+    due = [card for card in seen if store.due[card] <= now]
+    if due:
+        return "due", min(due, key=lambda card: store.due[card])
+    if len(seen) < len(cards):
+        return "new", None
+    if seen:
+        return "upcoming", min(seen, key=lambda card: store.due[card])
+    return None, None
+
+
+def assert_matches_reference(scheduler, group, now):
+    card = scheduler.next_card(group, now=now)
+    kind, expected = expected_next(scheduler, group, now)
+    if kind == "new":
+        assert scheduler.store.reviews[card] == 0
+        assert group == ALL_GROUPS or scheduler.groups[card] == group
+    else:
+        assert card == expected
+    return card
+
+
+def test_next_card_follows_due_order():
+    rng = np.random.default_rng(0)
+    groups = [["Food", "Travel", "Family", None][i % 4] for i in range(60)]
+    scheduler = ReviewScheduler(groups, seed=0)
+    now = 0.0
+    for _ in range(2000):
+        now += float(rng.exponential(DAY / 4))
+        group = rng.choice([ALL_GROUPS, "Food", "Travel", "Family"])
+        card = assert_matches_reference(scheduler, group, now)
+        scheduler.answer(card, correct=bool(rng.random() < 0.8), now=now)
+
+
+def test_most_overdue_card_comes_first():
+    scheduler = ReviewScheduler(["A"] * 4, seed=0)
+    for card, answered_at in zip(range(4), (30.0, 10.0, 20.0, 0.0)):
+        scheduler.answer(card, correct=True, now=answered_at)
+    now = 2 * DAY
+    order = []
+    for _ in range(4):
+        card = scheduler.next_card(now=now)
+        order.append(card)
+        scheduler.answer(card, correct=True, now=now)
+    assert order == [3, 1, 2, 0]
+
+
+def test_missed_card_returns_after_relearn_delay():
+    scheduler = ReviewScheduler(["A", "A"], seed=0)
+    first = scheduler.next_card(now=0.0)
+    assert scheduler.answer(first, correct=False, now=0.0) == RELEARN_DELAY
+    second = scheduler.next_card(now=1.0)
+    assert second != first  # the new card is asked while the missed one waits
+    scheduler.answer(second, correct=True, now=1.0)
+    assert scheduler.next_card(now=RELEARN_DELAY) == first
+
+
+def test_practicing_ahead_keeps_the_schedule():
+    scheduler = ReviewScheduler(["A"], seed=0)
+    due = scheduler.answer(0, correct=True, now=0.0)
+    assert scheduler.answer(0, correct=True, now=due / 2) == due
+    assert scheduler.store.repetitions[0] == 1
+
+
+def test_unschedulable_cards_are_never_chosen():
+    scheduler = ReviewScheduler([None, "A", None], seed=0)
+    assert len(scheduler) == 1
+    for now in (0.0, DAY, 10 * DAY):
+        card = scheduler.next_card(now=now)
+        assert card == 1
+        scheduler.answer(card, correct=True, now=now)
+    assert scheduler.next_card("missing group") is None
+
+
+def test_restored_store_keeps_due_order():
+    store = CardStore(5)
+    store.reviews[:4] = 1
+    store.due[:4] = [40.0, 10.0, 30.0, 20.0]
+    scheduler = ReviewScheduler(["A"] * 5, seed=0, store=store)
+    assert scheduler.next_card(now=100.0) == 1
+    assert scheduler.next_card(now=5.0) == 4  # nothing due yet, so the unseen card
+
+
+def test_next_cards_matches_answering_in_turn():
+    scheduler = ReviewScheduler(["A", "B"] * 10, seed=0)
+    for card, answered_at in zip(range(6), (50.0, 10.0, 40.0, 20.0, 30.0, 0.0)):
+        scheduler.answer(card, correct=True, now=answered_at)
+    now = 2 * DAY
+    drawn = scheduler.next_cards(now=now, count=10)
+    assert drawn[:6] == [5, 1, 3, 4, 2, 0]
+    assert len(set(drawn)) == 10
+    for expected in drawn:
+        card = scheduler.next_card(now=now)
+        assert card == expected
+        scheduler.answer(card, correct=True, now=now)
+
+
+def test_next_cards_stays_within_the_group():
+    scheduler = ReviewScheduler(["A", "B", None] * 4, seed=0)
+    cards = scheduler.next_cards("B", count=10)
+    assert sorted(cards) == [1, 4, 7, 10]
+    assert scheduler.next_cards("missing group") == []
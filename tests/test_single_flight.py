@@ -0,0 +1,50 @@
+"""Concurrent identical lookups share one upstream request."""
+import threading
+
+from translation_stub import offline_free_converter
+
+SESSIONS = 8
+
+
+def concurrent_translations(analyzer, stub, text):
+    """Translate `text` from SESSIONS converters sharing caches at once; returns (answers, google requests)"""
+    shared = analyzer.LookupCache(), analyzer.LookupCache()
+    converters = [offline_free_converter(analyzer) for _ in range(SESSIONS)]
+    for converter in converters:
+        converter.cache, converter.translation_cache = shared
+    start = threading.Barrier(SESSIONS)
+    answers = [None] * SESSIONS
+
+    def translate(index):
+        start.wait()
+        answers[index] = converters[index].translate_text(text)
+
+    before = stub.request_counts["google"]
+    threads = [threading.Thread(target=translate, args=(index,)) for index in range(SESSIONS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return answers, stub.request_counts["google"] - before
+
+
+def test_concurrent_lookups_for_one_key_make_one_request(analyzer, stub):
+    stub.configure("google", latency=0.2)
+    table = analyzer.get_in_flight_table()
+    followers = table.followers
+
+    answers, requests = concurrent_translations(analyzer, stub, "合并")
+    assert answers == ["translation of 合并"] * SESSIONS
+    assert requests == 1
+    assert table.followers - followers == SESSIONS - 1
+    assert len(table) == 0
+
+
+def test_failures_are_shared_and_not_left_in_flight(analyzer, stub):
+    stub.configure("google", latency=0.2, empty=True)
+    stub.configure("mymemory", empty=True)
+
+    answers, requests = concurrent_translations(analyzer, stub, "失敗")
+    assert answers == [analyzer.TRANSLATION_UNAVAILABLE] * SESSIONS
+    assert requests == 1
+    assert len(analyzer.get_in_flight_table()) == 0
@@ -0,0 +1,32 @@
+"""Tone sandhi in sentence pinyin."""
+import pytest
+
+
+@pytest.mark.parametrize("text, words, readings, expected", [
+    ("不是", ["不是"], {"不是": "bù shì"}, "bú shì"),
+    ("一個", ["一個"], {"一個": "yī gè"}, "yí gè"),
+    ("你好", ["你好"], {"你好": "nǐ hǎo"}, "ní hǎo"),
+    ("不好", ["不", "好"], {"不": "bù", "好": "hǎo"}, "bù hǎo"),
+    ("一天", ["一天"], {"一天": "yī tiān"}, "yì tiān"),
+    ("第一", ["第一"], {"第一": "dì yī"}, "dì yī"),
+    ("十一點", ["十一", "點"], {"十一": "shí yī", "點": "diǎn"}, "shí yī diǎn"),
+    ("我很好", ["我", "很", "好"], {"我": "wǒ", "很": "hěn", "好": "hǎo"}, "wó hén hǎo"),
+])
+def test_sandhi_within_a_clause(analyzer, text, words, readings, expected):
+    assert analyzer.build_sentence_pinyin(text, words, readings) == expected
+
+
+def test_sandhi_does_not_cross_punctuation(analyzer):
+    readings = {"你": "nǐ", "好": "hǎo", "我": "wǒ"}
+    assert analyzer.build_sentence_pinyin("你，我好", ["你", "我", "好"], readings) == "nǐ, wó hǎo"
+
+
+def test_dictionary_readings_are_unchanged(analyzer):
+    syllables = ["bù", "shì"]
+    analyzer.apply_tone_sandhi(list("不是"), syllables)
+    assert syllables == ["bù", "shì"]
+
+
+def test_analyzer_sentence_pinyin_applies_sandhi(analyzer, stub):
+    sentence = analyzer.EnhancedChineseAnalyzer().analyze_text("我不是老師，你好。")[1]
+    assert sentence["pinyin"] == "wǒ bú shì lǎo shī, ní hǎo."
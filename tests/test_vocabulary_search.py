@@ -0,0 +1,71 @@
+"""VocabularySearchIndex against a plain linear scan of the frame."""
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vocabulary import VocabularySearchIndex, match_rows, normalize_pinyin, prepare_vocabulary
+
+VOCABULARY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "china.xlsx")
+
+
+def linear_search(frame, query):
+    """Reference implementation: test every row's fields for the query substring"""
+    query = query.strip()
+    english, pinyin = query.lower(), normalize_pinyin(query)
+    hits = []
+    for row, (eng, hanzi, pin) in enumerate(zip(frame["English Word"], frame["Traditional Chinese Word"], frame["Pinyin"])):
+        if (english and english in eng.lower()) or (query and query in hanzi) \
+                or (pinyin and pinyin in normalize_pinyin(pin)):
+            hits.append(row)
+    return hits
+
+
+def sample_queries(frame, count, seed=0):
+    """Substrings of every field at lengths around the n-gram size, plus misses and formatting variants"""
+    rng = random.Random(seed)
+    texts = frame["English Word"].tolist() + frame["Traditional Chinese Word"].tolist() + frame["Pinyin"].tolist()
+    queries = ["", "   ", "zzzq", "不存在的詞", "Nǐ hǎo", "ni3 hao3", "NIHAO", " hello ", "!?"]
+    while len(queries) < count:
+        text = rng.choice(texts)
+        length = rng.randint(1, 6)
+        start = rng.randint(0, max(0, len(text) - length))
+        query = text[start:start + length]
+        queries.append(query.upper() if rng.random() < 0.2 else query)
+    return queries
+
+
+@pytest.fixture(scope="module")
+def vocabulary():
+    return prepare_vocabulary(pd.read_excel(VOCABULARY_FILE))
+
+
+def test_search_matches_linear_scan(vocabulary):
+    index = VocabularySearchIndex(vocabulary)
+    for query in sample_queries(vocabulary, 500):
+        assert index.search(query).tolist() == linear_search(vocabulary, query), query
+
+
+def test_incremental_index_matches_rebuilt_index(vocabulary):
+    previous = VocabularySearchIndex(vocabulary)
+    edited = vocabulary.copy()
+    edited.loc[5, "English Word"] = "Edited entry"
+    edited = edited.drop(index=[10, 11]).iloc[::-1]
+    added = pd.DataFrame([{"English Word": "Ferry", "Traditional Chinese Word": "渡輪", "Pinyin": "Dùlún",
+                           "Category": "Transport"}])
+    edited = prepare_vocabulary(pd.concat([edited, added], ignore_index=True))
+
+    incremental = VocabularySearchIndex(edited, previous, match_rows(vocabulary, edited))
+    rebuilt = VocabularySearchIndex(edited)
+    for query in sample_queries(edited, 300, seed=1) + ["Edited", "渡輪", "dulun"]:
+        expected = linear_search(edited, query)
+        assert incremental.search(query).tolist() == expected, query
+        assert rebuilt.search(query).tolist() == expected, query
+
+
+def test_search_returns_sorted_int_positions(vocabulary):
+    rows = VocabularySearchIndex(vocabulary).search("a")
+    assert rows.dtype.kind == "i"
+    assert np.all(np.diff(rows) > 0)
@@ -0,0 +1,292 @@
+"""Local stand-in for the Google Translate and MyMemory endpoints.
+
+Serves responses in the shapes ComprehensivePinyinConverter parses, with
+configurable latency and error rates per endpoint, so outages and slow
+responses can be reproduced without touching the real services.
+
+Usage:
+    python translation_stub.py serve [--port 8765] [--latency 0.2] [--error-rate 0.1]
+    python translation_stub.py harness
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks import load_analyzer_module
+
+ENDPOINTS = ("google", "mymemory")
+
+
+class EndpointBehavior:
+    """How one stub endpoint responds"""
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=503, empty=False):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.empty = empty
+
+
+class TranslationStub:
+    """Threaded HTTP server emulating both translation endpoints"""
+
+    def __init__(self, host="127.0.0.1", port=0, seed=0):
+        self.behaviors = {endpoint: EndpointBehavior() for endpoint in ENDPOINTS}
+        self.request_counts = {endpoint: 0 for endpoint in ENDPOINTS}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def google_url(self):
+        return f"{self.base_url}/google/translate_a/single"
+
+    @property
+    def mymemory_url(self):
+        return f"{self.base_url}/mymemory/get"
+
+    def configure(self, endpoint, **settings):
+        """Replace an endpoint's behavior, e.g. configure("google", error_rate=1.0)"""
+        self.behaviors[endpoint] = EndpointBehavior(**settings)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _should_fail(self, behavior):
+        with self._lock:
+            return self._rng.random() < behavior.error_rate
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                endpoint = parsed.path.strip("/").split("/")[0]
+                if endpoint not in stub.behaviors:
+                    self.send_error(404)
+                    return
+
+                with stub._lock:
+                    stub.request_counts[endpoint] += 1
+                behavior = stub.behaviors[endpoint]
+                if behavior.latency:
+                    time.sleep(behavior.latency)
+                if stub._should_fail(behavior):
+                    self.send_error(behavior.error_status)
+                    return
+
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                body = {} if behavior.empty else stub_response(endpoint, query)
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def stub_response(endpoint, query):
+    """Deterministic fake answer in the endpoint's JSON shape"""
+    text = query.get("q", "")
+    pinyin = " ".join("pīn" for char in text if not char.isspace())
+    translation = f"translation of {text}"
+    if endpoint == "google":
+        if query.get("dt") == "rm":
+            return [[[text, text, pinyin]], None, "zh-CN"]
+        return [[[translation, text]], None, "zh-CN"]
+    answer = pinyin if query.get("langpair", "").endswith("pinyin") else translation
+    return {"responseData": {"translatedText": answer}}
+
+
+def point_analyzer_at(module, stub, timeout=0.5):
+    """Route a loaded analyzer module's online lookups to the stub"""
+    module.GOOGLE_TRANSLATE_URL = stub.google_url
+    module.MYMEMORY_URL = stub.mymemory_url
+    module.GOOGLE_TIMEOUT = timeout
+    module.MYMEMORY_TIMEOUT = timeout
+    module.BACKOFF_BASE = 0.01
+    module.BACKOFF_MAX = 0.05
+    module.reset_circuit_breakers()
+    module.configure_outbound_limiter(rate=0)  # scenarios that need a limit set their own
+
+
+def offline_free_converter(module):
+    """Converter with the offline dictionary disabled so every lookup goes online"""
+    converter = module.ComprehensivePinyinConverter()
+    converter.cedict = None
+    return converter
+
+
+def run_harness(args):
+    """Simulate outages and slow responses and check the fallback chain's behavior"""
+    module = load_analyzer_module()
+    stub = TranslationStub().start()
+    timeout = 0.5
+    point_analyzer_at(module, stub, timeout=timeout)
+    threshold = module.BREAKER_FAILURE_THRESHOLD
+    results = []
+
+    def check(name, passed, detail):
+        results.append(passed)
+        print(f"[{'PASS' if passed else 'FAIL'}] {name}: {detail}")
+
+    def translate_many(converter, prefix, count):
+        start = time.perf_counter()
+        answers = [converter.translate_text(f"{prefix}{i}") for i in range(count)]
+        return answers, time.perf_counter() - start
+
+    try:
+        # 1. Healthy: everything answered by Google
+        converter = offline_free_converter(module)
+        answers, elapsed = translate_many(converter, "健康", 10)
+        check("healthy", all(a.startswith("translation of") for a in answers) and stub.request_counts["mymemory"] == 0,
+              f"10 lookups in {elapsed:.2f}s, google={stub.request_counts['google']} mymemory={stub.request_counts['mymemory']}")
+
+        # 2. Google returns 503: breaker opens, later calls go straight to MyMemory
+        module.reset_circuit_breakers()
+        stub.configure("google", error_rate=1.0, error_status=503)
+        before = stub.request_counts["google"]
+        converter = offline_free_converter(module)
+        answers, elapsed = translate_many(converter, "故障", 20)
+        google_calls = stub.request_counts["google"] - before
+        breaker = module.get_circuit_breaker(stub.google_url)
+        check("outage fails over", all(a.startswith("translation of") for a in answers) and breaker.state == "open"
+              and google_calls <= threshold * (1 + module.HTTP_MAX_RETRIES),
+              f"20 lookups in {elapsed:.2f}s, {google_calls} google requests, breaker {breaker.state}, "
+              f"{breaker.short_circuits} fast-failed")
+
+        # 3. Google slower than the timeout: only the first few calls wait
+        module.reset_circuit_breakers()
+        stub.configure("google", latency=timeout * 4)
+        converter = offline_free_converter(module)
+        answers, elapsed = translate_many(converter, "缓慢", 20)
+        budget = threshold * timeout + 20 * 0.1
+        check("slow endpoint", elapsed < budget,
+              f"20 lookups in {elapsed:.2f}s (serial timeouts would take {20 * timeout:.1f}s, budget {budget:.1f}s)")
+
+        # 4. Recovery: after the reset timeout a trial request closes the circuit again
+        stub.configure("google")
+        breaker = module.get_circuit_breaker(stub.google_url)
+        breaker.reset_timeout = 0.2
+        time.sleep(0.3)
+        before = stub.request_counts["google"]
+        converter.translate_text("恢复")
+        check("recovery", breaker.state == "closed" and stub.request_counts["google"] == before + 1,
+              f"breaker {breaker.state} after trial request")
+
+        # 5. Negative cache: a source that just failed on a text is not asked again
+        module.reset_circuit_breakers()
+        stub.configure("google", empty=True)
+        stub.configure("mymemory", empty=True)
+        converter = offline_free_converter(module)
+        converter.translate_text("否定")
+        before = dict(stub.request_counts)
+        converter.translation_cache.clear()
+        start = time.perf_counter()
+        answer = converter.translate_text("否定")
+        elapsed = time.perf_counter() - start
+        check("negative cache", stub.request_counts == before and answer == module.TRANSLATION_UNAVAILABLE,
+              f"repeat lookup answered in {elapsed * 1000:.2f}ms without upstream requests")
+
+        # 6. Intermittent errors are absorbed by retries with backoff
+        module.reset_circuit_breakers()
+        stub.configure("google", error_rate=0.3, error_status=429)
+        stub.configure("mymemory", error_rate=1.0)
+        converter = offline_free_converter(module)
+        answers, elapsed = translate_many(converter, "间歇", 30)
+        answered = sum(a.startswith("translation of") for a in answers)
+        check("retries", answered >= 27, f"{answered}/30 answered by google despite 30% rate limiting")
+
+        # 7. Concurrent identical lookups from many sessions share one request
+        module.reset_circuit_breakers()
+        stub.configure("google", latency=0.2)
+        stub.configure("mymemory")
+        shared = module.LookupCache(), module.LookupCache()
+        sessions = [offline_free_converter(module) for _ in range(8)]
+        for converter in sessions:
+            converter.cache, converter.translation_cache = shared
+        before = stub.request_counts["google"]
+        threads = [threading.Thread(target=converter.translate_text, args=("合并",)) for converter in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        google_calls = stub.request_counts["google"] - before
+        check("single flight", google_calls == 1, f"8 concurrent sessions, {google_calls} google request(s)")
+
+        # 8. The outbound token bucket caps the request rate
+        stub.configure("google")
+        limiter = module.configure_outbound_limiter(rate=20, burst=5)
+        converter = offline_free_converter(module)
+        answers, elapsed = translate_many(converter, "限速", 25)
+        check("rate limit", elapsed >= 0.9 and limiter.throttled >= 19,
+              f"25 lookups in {elapsed:.2f}s at 20/s with a burst of 5, {limiter.throttled} throttled")
+        module.configure_outbound_limiter(rate=0)
+    finally:
+        stub.stop()
+
+    print(f"\n{sum(results)}/{len(results)} scenarios passed")
+    return 0 if all(results) else 1
+
+
+def serve(args):
+    stub = TranslationStub(port=args.port)
+    for endpoint in ENDPOINTS:
+        stub.configure(endpoint, latency=args.latency, error_rate=args.error_rate)
+    print(f"Stub listening on {stub.base_url}")
+    print(f"  GOOGLE_TRANSLATE_URL={stub.google_url}")
+    print(f"  MYMEMORY_URL={stub.mymemory_url}")
+    stub.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local translation endpoint stub")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the stub until interrupted")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    serve_parser.set_defaults(func=serve)
+
+    harness_parser = subparsers.add_parser("harness", help="Simulate outages against the circuit breaker")
+    harness_parser.set_defaults(func=run_harness)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
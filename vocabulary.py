@@ -0,0 +1,270 @@
+"""Vocabulary data, search and quiz logic for the vocabulary app.
+
+Everything here is plain pandas/NumPy with no Streamlit calls, so it can be
+imported by benchmarks and scripts; streamlit_app.py wraps it in
+st.cache_resource so each piece is built once per vocabulary version.
+"""
+import hashlib
+import importlib.util
+import os
+import threading
+import unicodedata
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['English Word', 'Traditional Chinese Word', 'Pinyin', 'Category']
+TEXT_COLUMNS = ['English Word', 'Traditional Chinese Word', 'Pinyin']
+
+# pandas reads and writes Parquet through pyarrow; without it snapshots fall back to pickle
+# and Parquet uploads are not offered
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+SNAPSHOT_FORMAT = "parquet" if PARQUET_AVAILABLE else "pkl"
+
+def prepare_vocabulary(frame):
+    """Validate the required columns and normalize their dtypes (text columns as str, Category as categorical)"""
+    missing = [col for col in REQUIRED_COLUMNS if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    
+    frame = frame.copy()
+    for col in TEXT_COLUMNS:
+        frame[col] = frame[col].fillna("").astype(str).str.strip()
+    frame["Category"] = frame["Category"].fillna("Uncategorized").astype(str).str.strip().astype("category")
+    return frame.reset_index(drop=True)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def snapshot_path(path):
+    return f"{os.path.splitext(path)[0]}.{SNAPSHOT_FORMAT}"
+
+def read_snapshot(path, source_hash):
+    """Snapshot frame if one exists for exactly this version of the source file"""
+    try:
+        if SNAPSHOT_FORMAT == "parquet":
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_pickle(path)
+    except Exception:
+        return None
+    if frame.attrs.get("source_sha256") != source_hash:
+        return None
+    return frame
+
+def write_snapshot(frame, path, source_hash):
+    frame = frame.copy()
+    frame.attrs["source_sha256"] = source_hash
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        if SNAPSHOT_FORMAT == "parquet":
+            frame.to_parquet(temp_path, index=False)
+        else:
+            frame.to_pickle(temp_path)
+        os.replace(temp_path, path)
+    except Exception:
+        # A read-only checkout just means every cold start parses the xlsx
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def load_vocabulary_file(path):
+    """Vocabulary frame for an Excel file, read from its snapshot when the file is unchanged"""
+    source_hash = file_sha256(path)
+    snapshot = snapshot_path(path)
+    frame = read_snapshot(snapshot, source_hash)
+    if frame is not None:
+        frame.attrs.clear()
+        return frame
+    
+    frame = prepare_vocabulary(pd.read_excel(path))
+    write_snapshot(frame, snapshot, source_hash)
+    return frame
+
+def parse_vocabulary_file(name, data):
+    """Parse an uploaded .xlsx, .csv or .parquet file into a validated vocabulary frame"""
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".csv":
+        frame = pd.read_csv(BytesIO(data))
+    elif extension == ".parquet":
+        frame = pd.read_parquet(BytesIO(data))
+    else:
+        frame = pd.read_excel(BytesIO(data))
+    return prepare_vocabulary(frame)
+
+def match_rows(old_frame, new_frame):
+    """Position in new_frame of every old row with identical content, or -1 if it was removed or edited"""
+    def keyed(frame):
+        keys = frame[REQUIRED_COLUMNS].astype(str)
+        keys["occurrence"] = keys.groupby(REQUIRED_COLUMNS).cumcount()  # tells duplicate rows apart
+        keys["position"] = np.arange(len(frame))
+        return keys
+    
+    pairs = keyed(old_frame).merge(keyed(new_frame), on=REQUIRED_COLUMNS + ["occurrence"], suffixes=("_old", "_new"))
+    remap = np.full(len(old_frame), -1, dtype=np.int64)
+    remap[pairs["position_old"].to_numpy()] = pairs["position_new"].to_numpy()
+    return remap
+
+# Search index settings
+NGRAM_SIZE = 3  # longest indexed n-gram; longer queries intersect their trigrams
+
+def normalize_pinyin(text):
+    """Tone-insensitive pinyin key: "Nǐ hǎo", "ni3 hao3" and "nihao" all become "nihao" """
+    decomposed = unicodedata.normalize("NFD", str(text).lower())
+    return "".join(char for char in decomposed if "a" <= char <= "z").replace("v", "u")
+
+class VocabularySearchIndex:
+    """N-gram postings over English, Hanzi and normalized pinyin for substring search without scanning the frame"""
+
+    def __init__(self, frame, previous=None, remap=None):
+        """Index a frame; with the previous version's index and match_rows remap, only new rows are tokenized"""
+        self.size = len(frame)
+        texts = [
+            frame["English Word"].str.lower().tolist(),
+            frame["Traditional Chinese Word"].tolist(),
+            frame["Pinyin"].map(normalize_pinyin).tolist(),
+        ]
+        if previous is None:
+            self.fields = [(field, self._postings(field, range(len(field)))) for field in texts]
+        else:
+            self.fields = [(field, self._update(old_postings, field, remap))
+                           for field, (_, old_postings) in zip(texts, previous.fields)]
+
+    @staticmethod
+    def _postings(texts, rows):
+        """{gram: sorted row positions} for the given rows"""
+        grams, gram_rows = [], []
+        for row in rows:
+            text = texts[row]
+            distinct = {text[start:start + n] for n in range(1, NGRAM_SIZE + 1) for start in range(len(text) - n + 1)}
+            grams.extend(distinct)
+            gram_rows.extend([row] * len(distinct))
+        if not grams:
+            return {}
+        
+        # Group rows by gram with one stable sort instead of growing a list per gram
+        codes, uniques = pd.factorize(pd.Series(grams, dtype=object))
+        order = np.argsort(codes, kind="stable")
+        sorted_rows = np.asarray(gram_rows, dtype=np.int32)[order]
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        return dict(zip(uniques, np.split(sorted_rows, bounds)))
+
+    @classmethod
+    def _update(cls, old_postings, texts, remap):
+        """Carry unchanged rows' postings over to their new positions and tokenize only the added rows"""
+        kept = remap[remap >= 0]
+        monotonic = bool(np.all(np.diff(kept) > 0))
+        postings = {}
+        for gram, rows in old_postings.items():
+            moved = remap[rows]
+            moved = moved[moved >= 0].astype(np.int32)
+            if len(moved):
+                postings[gram] = moved if monotonic else np.sort(moved)
+        
+        is_kept = np.zeros(len(texts), dtype=bool)
+        is_kept[kept] = True
+        for gram, rows in cls._postings(texts, np.flatnonzero(~is_kept)).items():
+            postings[gram] = np.sort(np.concatenate((postings[gram], rows))) if gram in postings else rows
+        return postings
+
+    @staticmethod
+    def _search_field(field, query):
+        texts, postings = field
+        if not query:
+            return None
+        if len(query) <= NGRAM_SIZE:
+            return postings.get(query)
+        
+        # Intersect trigram postings (rarest first), then confirm the full substring
+        grams = {query[start:start + NGRAM_SIZE] for start in range(len(query) - NGRAM_SIZE + 1)}
+        lists = sorted((postings.get(gram) for gram in grams), key=lambda rows: -1 if rows is None else len(rows))
+        if lists[0] is None:
+            return None
+        candidates = lists[0]
+        for rows in lists[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                return None
+        return np.array([row for row in candidates if query in texts[row]], dtype=np.int32)
+
+    def search(self, query):
+        """Sorted row positions whose English, Chinese or pinyin contains the query (case and tone insensitive)"""
+        query = query.strip()
+        english, chinese, pinyin = self.fields
+        matches = [
+            self._search_field(english, query.lower()),
+            self._search_field(chinese, query),
+            self._search_field(pinyin, normalize_pinyin(query)),
+        ]
+        matches = [rows for rows in matches if rows is not None and len(rows)]
+        if not matches:
+            return np.empty(0, dtype=np.int32)
+        if len(matches) == 1:
+            return matches[0]
+        hits = np.zeros(self.size, dtype=bool)
+        for rows in matches:
+            hits[rows] = True
+        return np.flatnonzero(hits)
+
+def filter_vocabulary(frame, search_index, category="All", search=""):
+    """Learning Mode filter: rows matching the search (through the index) within a category"""
+    if search.strip():
+        frame = frame.iloc[search_index.search(search)]
+    if category != "All":
+        frame = frame[frame["Category"] == category]
+    return frame
+
+# Quiz settings
+QUIZ_DIFFICULTY_OPTIONS = {"Easy": 2, "Medium": 3, "Hard": 4}
+QUIZ_FIELDS = ['English Word', 'Traditional Chinese Word', 'Pinyin', 'Category']
+
+class QuizPools:
+    """Integer row pools per (category, difficulty), built once per vocabulary, for O(1) option draws"""
+
+    def __init__(self, frame):
+        self.columns = {col: frame[col].astype(str).to_numpy(dtype=object) for col in QUIZ_FIELDS}
+        # Each distinct English answer gets a code; options are drawn from distinct codes so they never repeat
+        self.english_codes, english_values = pd.factorize(frame["English Word"])
+        self.english_values = np.asarray(english_values, dtype=object)
+        
+        # Speech sentences are practiced in Speech Practice, not quizzed
+        eligible = np.flatnonzero(~frame["Category"].astype(str).str.contains("speech", case=False, na=False).to_numpy())
+        categories = frame["Category"].astype(str).to_numpy()[eligible]
+        row_pools = {"All": eligible}
+        for category in np.unique(categories):
+            row_pools[category] = eligible[categories == category]
+        
+        self.pools = {}
+        for category, rows in row_pools.items():
+            answer_codes = np.unique(self.english_codes[rows])
+            for difficulty, num_options in QUIZ_DIFFICULTY_OPTIONS.items():
+                self.pools[(category, difficulty)] = (rows, answer_codes, min(num_options, len(answer_codes)))
+
+    def schedule_groups(self):
+        """Category of every row, or None for rows the quiz never asks (for the review scheduler)"""
+        groups = [None] * len(self.english_codes)
+        for row in self.pools[("All", "Easy")][0]:
+            groups[row] = self.columns["Category"][row]
+        return groups
+
+    def question(self, row, category, difficulty, rng):
+        """Question for one row: its fields plus distinct wrong answers drawn from the category's pool"""
+        pool = self.pools.get((category, difficulty))
+        if pool is None:
+            return None
+        _, answer_codes, num_options = pool
+        code = self.english_codes[row]
+        
+        # Pick wrong answers among the other distinct codes by skipping over the correct one's rank
+        rank = np.searchsorted(answer_codes, code)
+        picks = rng.choice(len(answer_codes) - 1, size=num_options - 1, replace=False)
+        wrong = answer_codes[picks + (picks >= rank)]
+        options = self.english_values[np.concatenate(([code], wrong))]
+        question = {col: values[row] for col, values in self.columns.items()}
+        question["row"] = int(row)
+        question["options"] = options[rng.permutation(len(options))].tolist()
+        return question
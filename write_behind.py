@@ -0,0 +1,105 @@
+"""Batched SQLite writes on a background thread.
+
+Both persistent stores (lookup results in the analyzer, quiz progress in the
+vocabulary app) queue their writes here so the UI never waits on disk. Queued
+items are applied in batches, one transaction per batch, in the order they
+were queued. A batch that fails (typically "database is locked" while another
+worker process holds the write lock) is logged and retried with exponential
+backoff before anything queued after it is written; only a batch that still
+fails after WRITE_MAX_RETRIES is dropped, with an error in the log.
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+WRITE_MAX_RETRIES = 5
+WRITE_RETRY_BASE_DELAY = 0.5
+WRITE_RETRY_MAX_DELAY = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def connect(path):
+    """SQLite connection shared across threads, in WAL mode so readers don't block the writer"""
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class WriteBehindQueue:
+    """Background writer that applies queued items to a database in batches.
+
+    apply(connection, batch) executes the batch's statements and returns how many
+    rows it wrote (None counts every item); the queue wraps it in a transaction.
+    """
+
+    def __init__(self, path, apply, name, flush_interval=1.0, batch_size=500, max_retries=WRITE_MAX_RETRIES):
+        self.path = path
+        self.name = name
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._apply = apply
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self.written = 0
+        self.failures = 0
+        self.dropped = 0
+        self._writer = threading.Thread(target=self._write_loop, name=f"{name}-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _write_loop(self):
+        connection = connect(self.path)
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0 or self._stop.is_set() and self._queue.empty():
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                self._flush(connection, batch)
+        connection.close()
+
+    def _flush(self, connection, batch):
+        """Write one batch, retrying with backoff; later items wait so order is preserved"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with connection:
+                    written = self._apply(connection, batch)
+            except sqlite3.Error as e:
+                self.failures += 1
+                if attempt >= self.max_retries:
+                    self.dropped += len(batch)
+                    logger.error("%s: dropping %d queued writes after %d attempts: %s",
+                                 self.name, len(batch), attempt + 1, e)
+                    return
+                delay = min(WRITE_RETRY_MAX_DELAY, WRITE_RETRY_BASE_DELAY * 2 ** attempt)
+                logger.warning("%s: writing %d queued items failed (%s), retrying in %.1fs",
+                               self.name, len(batch), e, delay)
+                # Wakes early once close() is called, so shutdown isn't held up by the backoff
+                self._stop.wait(delay)
+            else:
+                self.written += len(batch) if written is None else written
+                return
+
+    def close(self):
+        """Flush queued writes and stop the writer thread"""
+        if not self._stop.is_set():
+            self._stop.set()
+            self._writer.join(timeout=10)